@@ -0,0 +1,271 @@
+"""
+Benchmarks the vectorized HOME_AWAY/OPP parsing against the previous row-wise apply() implementation,
+the point-in-time OPP_DEF_RATING/OPP_PACE context against a per-team running-total loop, the rolling-window
+engine against per-group transform(lambda) calls, and the searchsorted fatigue/travel windows against a
+per-team Python loop, on synthetic multi-season data; checks the outputs match and that fatigue time grows
+linearly with seasons. Finally times pre_processing.derive() on synthetic box scores against the same steps
+without the usage / per-possession stage (whose rates are checked against pandas groupby rolling sums) to show
+what that stage adds to a nightly run.
+
+Run: python bench_feature_derivation.py --seasons 40 --games 40
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from feature_derivation import parse_matchup, point_in_time_context, team_game_totals
+from rolling_features import add_rolling_features
+from schedule_features import DISTANCE_KM, fatigue_features
+import pre_processing
+from usage_features import FTA_WEIGHT
+
+TEAMS = ["ATL", "CHI", "CON", "DAL", "GSV", "IND", "LAS", "LVA", "MIN", "NYL", "PHO", "SEA", "WSH"]
+
+
+def synthetic_logs(n_seasons: int, games_per_team: int, players_per_team: int = 12, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = n_seasons * len(TEAMS) * games_per_team * players_per_team
+    team_idx = rng.integers(0, len(TEAMS), n)
+    opp_idx = (team_idx + rng.integers(1, len(TEAMS), n)) % len(TEAMS)
+    teams, opps = np.array(TEAMS)[team_idx], np.array(TEAMS)[opp_idx]
+    sep = np.where(rng.random(n) < 0.5, " @ ", " vs. ")
+    return pd.DataFrame({
+        "SEASON_YEAR": 2024 - n_seasons + 2 + rng.integers(0, n_seasons, n),
+        "PLAYER_ID": np.sort(rng.integers(0, len(TEAMS) * players_per_team * max(n_seasons // 4, 1), n)),
+        "MATCHUP": pd.Series(teams, dtype=object) + sep + opps,
+        "OPP": opps,
+        "PTS": rng.integers(0, 40, n).astype(float),
+    })
+
+
+def legacy(df: pd.DataFrame) -> pd.DataFrame:
+    out = pd.DataFrame(index=df.index)
+    out["HOME_AWAY"] = df["MATCHUP"].apply(lambda m: "Away" if "@" in m else "Home")
+    out["OPP"] = df["MATCHUP"].apply(lambda m: m.split()[-1])
+    return out
+
+
+def vectorized(df: pd.DataFrame) -> pd.DataFrame:
+    out = pd.DataFrame(index=df.index)
+    out["HOME_AWAY"], out["OPP"] = parse_matchup(df["MATCHUP"])
+    return out
+
+
+CONTEXT_SUMS = ["GAME_POSS", "PTS_ALLOWED", "GAME_MIN"]
+
+
+def legacy_context(team_games: pd.DataFrame) -> pd.DataFrame:
+    """point_in_time_context() as a per team-season loop over running totals."""
+    tg = team_games.dropna(subset=CONTEXT_SUMS).sort_values(["TEAM_ABBREVIATION", "GAME_DATE"], kind="stable")
+    groups = {key: g for key, g in tg.groupby([tg["SEASON_YEAR"].astype(int), "TEAM_ABBREVIATION"])}
+    finals = {key: g[CONTEXT_SUMS].sum() for key, g in groups.items()}
+    rows = []
+    for (season, team), g in groups.items():
+        prev = finals.get((season - 1, team))
+        poss = allowed = minutes = 0.0
+        for i, r in enumerate(g.itertuples()):
+            if i == 0:  # first game of the season: last season's finals, NaN if there are none
+                p, a, m = prev.to_numpy() if prev is not None else (np.nan,) * 3
+            else:
+                p, a, m = poss, allowed, minutes
+            rows.append({"GAME_ID": r.GAME_ID, "TEAM_ABBREVIATION": team,
+                         "DEF_RATING": 100 * a / p, "PACE": 40 * p / m})
+            poss, allowed, minutes = poss + r.GAME_POSS, allowed + r.PTS_ALLOWED, minutes + r.GAME_MIN
+    return pd.DataFrame(rows)
+
+
+ROLLING_SPECS = [
+    ("avg_prev_5",     ("PLAYER_ID",),       "PTS", 5),
+    ("avg_prev_15",    ("PLAYER_ID",),       "PTS", 15),
+    ("avg_prev_opp_3", ("PLAYER_ID", "OPP"), "PTS", 3),
+]
+
+
+def legacy_rolling(df: pd.DataFrame) -> pd.DataFrame:
+    out = pd.DataFrame(index=df.index)
+    for name, keys, col, window in ROLLING_SPECS:
+        out[name] = df.groupby(list(keys))[col].transform(
+            lambda x: x.shift(1).rolling(window=window, min_periods=1).mean()
+        )
+    return out
+
+
+def engine_rolling(df: pd.DataFrame) -> pd.DataFrame:
+    out = df[["PLAYER_ID", "OPP", "PTS"]].copy()
+    add_rolling_features(out, ROLLING_SPECS)
+    return out[[spec[0] for spec in ROLLING_SPECS]]
+
+
+FATIGUE_WINDOWS = [3, 7]
+
+
+def synthetic_schedule(n_seasons: int, games_per_team: int, season_days: int = 120, seed: int = 0) -> pd.DataFrame:
+    """Team-game rows: each team plays games_per_team distinct days a season, at home or a random arena."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for s in range(n_seasons):
+        opening = np.datetime64("1990-05-15") + np.timedelta64(365 * s, "D")
+        for t in TEAMS:
+            days = np.sort(rng.choice(season_days, games_per_team, replace=False))
+            away = np.array(TEAMS)[rng.integers(0, len(TEAMS), games_per_team)]
+            rows.append(pd.DataFrame({"TEAM_ABBREVIATION": t, "GAME_DATE": opening + days,
+                                      "VENUE": np.where(rng.random(games_per_team) < 0.5, t, away)}))
+    schedule = pd.concat(rows, ignore_index=True)
+    schedule["GAME_ID"] = np.arange(len(schedule))
+    return schedule
+
+
+def legacy_fatigue(schedule: pd.DataFrame) -> pd.DataFrame:
+    out = []
+    for team, g in schedule.sort_values("GAME_DATE", kind="stable").groupby("TEAM_ABBREVIATION", sort=True):
+        days = g["GAME_DATE"].to_numpy().astype("datetime64[D]").astype(int)
+        venues = g["VENUE"].to_numpy()
+        travel = [0.0] + [DISTANCE_KM.loc[venues[i - 1], venues[i]] for i in range(1, len(g))]
+        for i in range(len(g)):
+            row = {"GAME_ID": g["GAME_ID"].iat[i], "TEAM_ABBREVIATION": team, "travel_km": travel[i],
+                   "back_to_back": int(i > 0 and days[i] - days[i - 1] == 1)}
+            for n in FATIGUE_WINDOWS:
+                j = i
+                while j > 0 and days[i] - days[j - 1] <= n:
+                    j -= 1
+                row[f"games_last_{n}d"] = i - j
+                row[f"km_last_{n}d"] = sum(travel[j:i + 1])
+            out.append(row)
+    return pd.DataFrame(out)
+
+
+def synthetic_box_logs(n_seasons: int, games_per_team: int, players_per_team: int = 12, seed: int = 0) -> pd.DataFrame:
+    """Player box scores for whole games: every round pairs the teams at random (one sits out), two days apart."""
+    rng = np.random.default_rng(seed)
+    games = []
+    for s in range(n_seasons):
+        opening = np.datetime64("1990-05-15") + np.timedelta64(365 * s, "D")
+        for r in range(games_per_team):
+            order = rng.permutation(len(TEAMS))[: len(TEAMS) // 2 * 2].reshape(-1, 2)
+            games.append(pd.DataFrame({"SEASON_YEAR": 1990 + s, "GAME_DATE": opening + np.timedelta64(2 * r, "D"),
+                                       "home": order[:, 0], "away": order[:, 1]}))
+    games = pd.concat(games, ignore_index=True)
+    games["GAME_ID"] = np.arange(len(games))
+    sides = pd.concat([games.assign(team=games["home"], opp=games["away"], sep=" vs. "),
+                       games.assign(team=games["away"], opp=games["home"], sep=" @ ")], ignore_index=True)
+    logs = sides.loc[sides.index.repeat(players_per_team)].reset_index(drop=True)
+    n = len(logs)
+    slot = np.tile(np.arange(players_per_team), len(sides))
+    teams = np.array(TEAMS)
+    minutes = np.clip(rng.normal(40 - 2.5 * slot, 4), 0, 40).astype(np.float32)
+    fga = rng.poisson(minutes / 3)
+    fta = rng.poisson(minutes / 10)
+    logs = pd.DataFrame({
+        "SEASON_YEAR": logs["SEASON_YEAR"].astype(np.int16),
+        "PLAYER_ID": (logs["SEASON_YEAR"] * 1000 + logs["team"] * players_per_team + slot).astype(np.int32),
+        "PLAYER_NAME": "p" + pd.Series(slot).astype(str),
+        "TEAM_ABBREVIATION": teams[logs["team"]],
+        "GAME_ID": logs["GAME_ID"],
+        "GAME_DATE": logs["GAME_DATE"],
+        "MATCHUP": pd.Series(teams[logs["team"]], dtype=object) + logs["sep"] + teams[logs["opp"]],
+        "WL": np.where(rng.random(n) < 0.5, "W", "L"),
+        "MIN": minutes,
+        "PTS": (fga * rng.uniform(0.6, 1.3, n) + fta * 0.75).round().astype(np.int16),
+        "FGA": fga.astype(np.int16), "FTA": fta.astype(np.int16),
+        "OREB": rng.poisson(minutes / 20).astype(np.int16), "TOV": rng.poisson(minutes / 15).astype(np.int16),
+    })
+    return logs.sort_values(["GAME_DATE", "GAME_ID"], kind="stable").reset_index(drop=True)
+
+
+def derive_without_usage(logs: pd.DataFrame) -> pd.DataFrame:
+    """pre_processing.derive() minus the usage / per-possession stage, from the same building blocks."""
+    pp = pre_processing
+    df = logs.sort_values(["PLAYER_ID", "GAME_DATE"]).reset_index(drop=True)
+    df = pp.add_rest_features(df)
+    box = pp.team_box_totals(logs)
+    df["HOME_AWAY"], df["OPP"] = parse_matchup(df["MATCHUP"])
+    df = pp.add_fatigue_features(df, pp.team_schedule(df))
+    pp.add_rolling_features(df, pp.ROLLING_SPECS)
+    return pp.add_context_features(df, team_game_totals(logs, box))
+
+
+def reference_usage(logs: pd.DataFrame, window: int) -> pd.DataFrame:
+    """The rates from team transform() totals and groupby shift/rolling sums (no shared code with usage_features)."""
+    df = logs.sort_values(["PLAYER_ID", "GAME_DATE"]).reset_index(drop=True)
+    f = df[["MIN", "PTS", "FGA", "FTA", "OREB", "TOV"]].astype(float)
+    team = f.groupby([df["GAME_ID"], df["TEAM_ABBREVIATION"]]).transform("sum")
+    used, team_used = f["FGA"] + FTA_WEIGHT * f["FTA"] + f["TOV"], team["FGA"] + FTA_WEIGHT * team["FTA"] + team["TOV"]
+    team_poss = team["FGA"] + FTA_WEIGHT * team["FTA"] - team["OREB"] + team["TOV"]
+    team_rows = team_poss.groupby([df["GAME_ID"], df["TEAM_ABBREVIATION"]]).transform("size")
+    game_poss = (team_poss / team_rows).groupby(df["GAME_ID"]).transform("sum") / 2  # both teams' totals, once each
+    parts = pd.DataFrame({"un": used * team["MIN"] / 5, "ud": f["MIN"] * team_used, "tsa": f["FGA"] + FTA_WEIGHT * f["FTA"],
+                          "pts": f["PTS"], "min": f["MIN"], "poss": f["MIN"] * game_poss / (team["MIN"] / 5)})
+    sums = parts.groupby(df["PLAYER_ID"]).shift(1).groupby(df["PLAYER_ID"]).rolling(window, min_periods=1).sum()
+    sums = sums.reset_index(level=0, drop=True).sort_index()
+    ratio = lambda n, d, k: (k * n / d).where(d > 0)
+    return pd.DataFrame({
+        "PLAYER_ID": df["PLAYER_ID"], "GAME_DATE": df["GAME_DATE"],
+        f"usg_pct_prev_{window}": ratio(sums["un"], sums["ud"], 100.0),
+        f"ts_pct_prev_{window}": ratio(sums["pts"], sums["tsa"], 0.5),
+        f"pts_per_min_prev_{window}": ratio(sums["pts"], sums["min"], 1.0),
+        f"pts_per_100_prev_{window}": ratio(sums["pts"], sums["poss"], 100.0),
+    })
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="apply() vs vectorized feature derivation")
+    parser.add_argument("--seasons", type=int, default=40)
+    parser.add_argument("--games", type=int, default=40, help="games per team per season")
+    args = parser.parse_args()
+
+    df = synthetic_logs(args.seasons, args.games)
+    print(f"Synthetic logs: {len(df):,} rows, {args.seasons} seasons")
+
+    old, t_old = timed(legacy, df)
+    new, t_new = timed(vectorized, df)
+    pd.testing.assert_frame_equal(old, new, check_exact=True)
+    print(f"apply():    {t_old:8.3f}s")
+    print(f"vectorized: {t_new:8.3f}s  ({t_old / t_new:.0f}x faster, outputs identical)")
+
+    logs = synthetic_box_logs(args.seasons, args.games)
+    team_games = team_game_totals(logs)
+    old, t_old = timed(legacy_context, team_games)
+    new, t_new = timed(point_in_time_context, team_games)
+    key = ["GAME_ID", "TEAM_ABBREVIATION"]
+    old = old.sort_values(key).reset_index(drop=True)
+    new = new.sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(old, new[old.columns], check_dtype=False, rtol=1e-9)
+    print(f"context per-team loop:     {t_old:8.3f}s  ({len(team_games):,} team-games)")
+    print(f"context cumsum:            {t_new:8.3f}s  ({t_old / t_new:.0f}x faster, outputs match)")
+
+    old, t_old = timed(legacy_rolling, df)
+    new, t_new = timed(engine_rolling, df)
+    pd.testing.assert_frame_equal(old, new, check_exact=True)
+    print(f"rolling transform(lambda): {t_old:8.3f}s")
+    print(f"rolling engine:            {t_new:8.3f}s  ({t_old / t_new:.0f}x faster, outputs identical)")
+
+    schedule = synthetic_schedule(args.seasons, args.games)
+    old, t_old = timed(legacy_fatigue, schedule)
+    new, t_new = timed(fatigue_features, schedule, FATIGUE_WINDOWS)
+    key = ["GAME_ID", "TEAM_ABBREVIATION"]
+    old = old.sort_values(key).reset_index(drop=True)
+    new = new.sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(old, new[old.columns], check_dtype=False, rtol=1e-9)
+    print(f"fatigue per-team loop:     {t_old:8.3f}s  ({len(schedule):,} team-games)")
+    print(f"fatigue searchsorted:      {t_new:8.3f}s  ({t_old / t_new:.0f}x faster, outputs match)")
+    for n_seasons in (args.seasons, 4 * args.seasons, 16 * args.seasons):
+        schedule = synthetic_schedule(n_seasons, args.games)
+        _, t = timed(fatigue_features, schedule, FATIGUE_WINDOWS)
+        print(f"  {n_seasons:5d} seasons, {len(schedule):9,} team-games: {t:7.3f}s  ({len(schedule) / t:,.0f} rows/s)")
+
+    window = pre_processing.USAGE_WINDOW
+    base, t_base = min((timed(derive_without_usage, logs) for _ in range(3)), key=lambda r: r[1])
+    full, t_full = min((timed(pre_processing.derive, logs) for _ in range(3)), key=lambda r: r[1])
+    pd.testing.assert_frame_equal(base, full[base.columns])  # the baseline is derive() minus the usage columns
+    rates = [c for c in full.columns if c.endswith(f"_prev_{window}")]
+    expected = reference_usage(logs, window)
+    actual = full[["PLAYER_ID", "GAME_DATE"] + rates].sort_values(["PLAYER_ID", "GAME_DATE"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(actual, expected[actual.columns], check_dtype=False, rtol=1e-6)
+    print(f"derive() without usage:    {t_base:8.3f}s  ({len(logs):,} player-games, {len(logs) / t_base:,.0f} rows/s)")
+    print(f"derive() with usage:       {t_full:8.3f}s  (+{100 * (t_full / t_base - 1):.0f}%, {len(rates)} rates match rolling sums)")
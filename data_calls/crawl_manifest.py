@@ -0,0 +1,93 @@
+"""
+Crawl manifest for incremental, resumable runs of season_list_box_scores.py.
+Records each player-season's last GAME_DATE (the watermark), row count and fetch time in a
+JSON file next to the parquets. It is rewritten atomically after every player (after every window
+in bulk mode) so a crash loses at most the requests in flight.
+"""
+import json
+import os
+from datetime import datetime, timedelta
+
+MANIFEST_NAME = "manifest.json"
+
+
+class CrawlManifest:
+    def __init__(self, out_dir: str, live_season: str, refresh_hours: float = 6.0):
+        self.path = os.path.join(out_dir, MANIFEST_NAME)
+        self.live_season = live_season
+        self.refresh = timedelta(hours=refresh_hours)
+        self.players = {}   # "season/pid" -> {last_game_date, rows, fetched_at}
+        self.seasons = {}   # season -> {complete, finished_at}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                saved = json.load(f)
+            self.players = saved.get("players", {})
+            self.seasons = saved.get("seasons", {})
+
+    @staticmethod
+    def key(pid: str, season: str) -> str:
+        return f"{season}/{pid}"
+
+    def get(self, pid: str, season: str) -> dict | None:
+        return self.players.get(self.key(pid, season))
+
+    def season_complete(self, season: str) -> bool:
+        """A past season that finished without errors needs no roster or log calls."""
+        entry = self.seasons.get(season, {})
+        return season != self.live_season and entry.get("complete", False) and entry.get("final", False)
+
+    def mark_season(self, season: str, complete: bool):
+        entry = self.seasons.setdefault(season, {})
+        entry["complete"] = complete
+        entry["final"] = season != self.live_season
+        entry["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        self.save()
+
+    def bulk_through(self, season: str) -> str | None:
+        """Last date (YYYY-MM-DD) fully covered by league-wide bulk pulls, if any."""
+        return self.seasons.get(season, {}).get("bulk_through")
+
+    def set_bulk_through(self, season: str, date_to: str, save: bool = True):
+        """date_to is the MM/DD/YYYY upper bound of the last successful window."""
+        through = datetime.strptime(date_to, "%m/%d/%Y").strftime("%Y-%m-%d")
+        self.seasons.setdefault(season, {})["bulk_through"] = through
+        if save:
+            self.save()
+
+    def needs_fetch(self, pid: str, season: str) -> bool:
+        """Past seasons are final once fetched after they ended; the live season is refreshed after refresh_hours."""
+        entry = self.get(pid, season)
+        if entry is None:
+            return True
+        if season != self.live_season:
+            return not entry.get("final", False)
+        fetched_at = datetime.fromisoformat(entry["fetched_at"])
+        return datetime.now() - fetched_at >= self.refresh
+
+    def date_from(self, pid: str, season: str) -> str:
+        """DateFrom param (MM/DD/YYYY) for the day after the watermark, '' for a full pull."""
+        entry = self.get(pid, season)
+        if entry is None or not entry.get("last_game_date"):
+            return ""
+        last = datetime.fromisoformat(entry["last_game_date"])
+        return (last + timedelta(days=1)).strftime("%m/%d/%Y")
+
+    def record(self, pid: str, season: str, last_game_date, rows: int, save: bool = True):
+        """save=False only updates memory, for callers that record a batch of players and save() once."""
+        entry = self.get(pid, season) or {}
+        if last_game_date is not None:
+            entry["last_game_date"] = last_game_date.strftime("%Y-%m-%d")
+        else:
+            entry.setdefault("last_game_date", None)
+        entry["rows"] = rows
+        entry["final"] = season != self.live_season
+        entry["fetched_at"] = datetime.now().isoformat(timespec="seconds")
+        self.players[self.key(pid, season)] = entry
+        if save:
+            self.save()
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"seasons": self.seasons, "players": self.players}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
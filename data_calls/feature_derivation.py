@@ -0,0 +1,76 @@
+"""
+Vectorized feature derivation used by pre_processing.py.
+Matchup parsing runs once per distinct MATCHUP string and is broadcast back with the factorized codes;
+opponent context comes from per team-game box totals with grouped cumulative sums, in one pass.
+"""
+import numpy as np
+import pandas as pd
+
+
+def parse_matchup(matchup: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """Return (HOME_AWAY, OPP) for MATCHUP strings like 'LVA @ ATL' / 'LVA vs. ATL'."""
+    codes, uniques = pd.factorize(matchup, sort=False)
+    uniques = pd.Series(uniques)
+    home_away = pd.Series(np.where(uniques.str.contains("@", regex=False), "Away", "Home"))
+    opp = uniques.str.extract(r"(\S+)\s*$", expand=False)  # last token, as m.split()[-1]
+    # infer_objects() gives the same string dtype apply() would have inferred
+    return (home_away.take(codes).set_axis(matchup.index).infer_objects(),
+            opp.take(codes).set_axis(matchup.index).infer_objects())
+
+
+BOX_STATS = ["PTS", "FGA", "FTA", "OREB", "TOV", "MIN"]
+
+
+def team_box_totals(logs: pd.DataFrame) -> pd.DataFrame:
+    """One row per (GAME_ID, team): the team's BOX_STATS summed from player box scores, plus
+    estimated possessions (FGA + 0.44*FTA - OREB + TOV, averaged over both teams), points allowed
+    and game minutes. NaN where the opponent's box score is missing."""
+    logs = logs.astype({c: "float64" for c in BOX_STATS})  # compact int16/float32 inputs would overflow in season sums
+    tg = logs.groupby(["GAME_ID", "TEAM_ABBREVIATION"], as_index=False, observed=True).agg(
+        SEASON_YEAR=("SEASON_YEAR", "first"), GAME_DATE=("GAME_DATE", "first"),
+        **{c: (c, "sum") for c in BOX_STATS}
+    )
+    poss = tg["FGA"] + 0.44 * tg["FTA"] - tg["OREB"] + tg["TOV"]
+    by_game = tg.groupby("GAME_ID", observed=True)
+    game_pts = by_game["PTS"].transform("sum")
+    game_poss = poss.groupby(tg["GAME_ID"]).transform("sum")
+    teams_in_game = by_game["PTS"].transform("size")
+    complete = teams_in_game == 2
+    tg["GAME_POSS"] = (game_poss / 2).where(complete)
+    tg["PTS_ALLOWED"] = (game_pts - tg["PTS"]).where(complete)
+    tg["GAME_MIN"] = (tg["MIN"] / 5).where(complete)  # five players on the floor
+    return tg
+
+
+def team_game_totals(logs: pd.DataFrame, box: pd.DataFrame | None = None) -> pd.DataFrame:
+    """The per team-game columns point_in_time_context() needs; box is team_box_totals(logs) if already computed."""
+    tg = team_box_totals(logs) if box is None else box
+    return tg[["SEASON_YEAR", "TEAM_ABBREVIATION", "GAME_DATE", "GAME_ID",
+               "GAME_POSS", "PTS_ALLOWED", "GAME_MIN"]]
+
+
+def point_in_time_context(team_games: pd.DataFrame) -> pd.DataFrame:
+    """DEF_RATING (points allowed per 100 possessions) and PACE (possessions per 40 minutes) for
+    every team-game, from that team's earlier games of the same season only. A team's first game
+    of a season falls back to its full previous season; with neither the values are NaN."""
+    sums = ["GAME_POSS", "PTS_ALLOWED", "GAME_MIN"]
+    tg = team_games.dropna(subset=sums).sort_values(["TEAM_ABBREVIATION", "GAME_DATE"], kind="stable")
+    season_team = [tg["SEASON_YEAR"].astype(int), tg["TEAM_ABBREVIATION"]]
+    prior = tg[sums].groupby(season_team).cumsum() - tg[sums]  # exclusive of the current game
+    has_prior = tg.groupby(season_team).cumcount() > 0
+
+    def rates(totals):
+        return (100 * totals["PTS_ALLOWED"] / totals["GAME_POSS"],
+                40 * totals["GAME_POSS"] / totals["GAME_MIN"])
+
+    def_rating, pace = rates(prior)
+    finals = tg[sums].groupby(season_team).sum()
+    last_def, last_pace = rates(finals)
+    prev_key = pd.MultiIndex.from_arrays([tg["SEASON_YEAR"].astype(int) - 1, tg["TEAM_ABBREVIATION"]])
+    prev_def = last_def.reindex(prev_key).to_numpy()
+    prev_pace = last_pace.reindex(prev_key).to_numpy()
+
+    out = tg[["SEASON_YEAR", "TEAM_ABBREVIATION", "GAME_DATE", "GAME_ID"]].copy()
+    out["DEF_RATING"] = np.where(has_prior, def_rating, prev_def)
+    out["PACE"] = np.where(has_prior, pace, prev_pace)
+    return out.reset_index(drop=True)
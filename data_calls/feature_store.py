@@ -0,0 +1,68 @@
+"""
+Typed columnar feature store shared by pre_processing.py, gather_model_inputs.py and ml/.
+The processed table is written once as an uncompressed Arrow IPC file so readers can memory-map it:
+string keys become dictionary (pandas categorical) columns, numerics are stored as int8/int16/float32.
+"""
+import os
+import pyarrow as pa
+import pyarrow.feather as feather
+
+FEATURE_STORE = "processed_2024_2025.arrow"
+
+CATEGORICAL = ["PLAYER_NAME", "TEAM_ABBREVIATION", "MATCHUP", "WL", "HOME_AWAY", "OPP"]
+DTYPES = {
+    "SEASON_YEAR":    pa.int16(),
+    "PLAYER_ID":      pa.int32(),
+    "GAME_DATE":      pa.timestamp("s"),
+    "MIN":            pa.float32(),
+    "PTS":            pa.int8(),
+    "team_rest_days": pa.int16(),   # off-season gaps exceed int8
+    "rest_diff":      pa.int16(),
+    "back_to_back":   pa.int8(),
+    "FGA":            pa.int8(),    # box-score counts kept for usage / true shooting
+    "FTA":            pa.int8(),
+    "OREB":           pa.int8(),
+    "TOV":            pa.int8(),
+}
+COUNT_PREFIXES = ("games_last_",)  # small per-window game counts
+
+
+def _arrow_type(name: str, current: pa.DataType) -> pa.DataType:
+    if name in DTYPES:
+        return DTYPES[name]
+    if name.startswith(COUNT_PREFIXES):
+        return pa.int8()
+    if name in CATEGORICAL:
+        return pa.dictionary(pa.int16(), pa.string())
+    if pa.types.is_floating(current):
+        return pa.float32()
+    return current
+
+
+def to_table(df) -> pa.Table:
+    """Cast the processed frame onto the store's compact types."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema = pa.schema([pa.field(f.name, _arrow_type(f.name, f.type)) for f in table.schema])
+    return table.cast(schema, safe=False)
+
+
+def write_features(df, path: str = FEATURE_STORE) -> pa.Table:
+    """Cast the processed frame onto the store's compact types and write it as Arrow IPC.
+    Written to a temp file and swapped in, so frames still memory-mapped from the old file stay valid."""
+    table = to_table(df)
+    tmp = path + ".tmp"
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, path)
+    return table
+
+
+def read_table(path: str = FEATURE_STORE, columns=None) -> pa.Table:
+    """Memory-mapped read; only the requested columns are materialized."""
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.select(columns) if columns is not None else table
+
+
+def load_features(path: str = FEATURE_STORE, columns=None):
+    """Processed table as a pandas frame with categorical keys and compact numerics."""
+    return read_table(path, columns).to_pandas()
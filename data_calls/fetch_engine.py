@@ -0,0 +1,132 @@
+"""
+Concurrent, rate-limited HTTP fetch engine for the stats.wnba.com crawler.
+Keeps several requests in flight on a bounded thread pool while a shared token bucket
+caps the request rate. Backs off on 429/5xx and reuses pooled keep-alive connections.
+Every attempt's latency and status, and the retries each call needed, go to an instrumentation.HttpStats.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+import instrumentation
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def slow_down(self, factor: float = 0.5, floor: float = 0.1):
+        """Multiplicative decrease after the server pushes back."""
+        with self.lock:
+            self._refill()
+            self.rate = max(floor, self.rate * factor)
+            self.tokens = min(self.tokens, 0)
+
+    def speed_up(self, step: float = 0.05):
+        """Additive increase (step * configured rate) back towards the configured rate after a success."""
+        with self.lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + step * self.max_rate)
+
+
+class FetchEngine:
+    """Session-like wrapper: get() is rate limited and retried, map() runs jobs concurrently."""
+
+    def __init__(self, headers: dict, max_workers: int = 4, rate: float = 2.0,
+                 burst: float = 4, max_retries: int = 5, backoff_base: float = 1.0,
+                 timeout: float = 30.0, http_stats=None):
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate, burst)
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        # one pooled keep-alive connection per worker
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.stats_lock = threading.Lock()
+        self.retries = 0
+        self.requests = 0
+        self.http = http_stats or instrumentation.HTTP
+
+    def _backoff(self, attempt: int, resp) -> float:
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff_base * (2 ** attempt) + random.random() * self.backoff_base
+
+    def get(self, url: str, params: dict | None = None, headers: dict | None = None, label: str | None = None):
+        """GET with token-bucket pacing; retries 429/5xx and connection errors with backoff.
+        label names the call in the HTTP stats (defaults to the URL path)."""
+        label = label or urlparse(url).path or "/"
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            with self.stats_lock:
+                self.requests += 1
+            resp = None
+            start = time.perf_counter()
+            try:
+                resp = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                self.http.attempt(label, time.perf_counter() - start, None)
+                if attempt == self.max_retries:
+                    self.http.call(label, attempt)
+                    raise
+            else:
+                self.http.attempt(label, time.perf_counter() - start, resp.status_code)
+            if resp is not None and resp.status_code not in RETRY_STATUSES:
+                self.bucket.speed_up()
+                self.http.call(label, attempt)
+                return resp
+            if resp is not None and attempt == self.max_retries:
+                self.http.call(label, attempt)
+                return resp  # let the caller's raise_for_status() surface it
+            if resp is not None and resp.status_code == 429:
+                self.bucket.slow_down()
+            with self.stats_lock:
+                self.retries += 1
+            time.sleep(self._backoff(attempt, resp))
+
+    def map(self, fn, items):
+        """Run fn(item) on the pool; yield (item, result, error) in completion order."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(fn, item): item for item in items}
+            for fut in as_completed(futures):
+                item = futures[fut]
+                try:
+                    yield item, fut.result(), None
+                except Exception as e:
+                    yield item, None, e
+
+    def close(self):
+        self.session.close()
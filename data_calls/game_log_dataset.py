@@ -0,0 +1,139 @@
+"""
+Hive-partitioned Parquet dataset of game logs (SEASON_YEAR=<season>/TEAM_ABBREVIATION=<team>/).
+The crawler streams rows into it as they are fetched, so peak memory no longer grows with the crawl: bulk
+mode writes each date window once (one file per partition), player mode each player-season.
+Readers load only the seasons, teams and columns they ask for.
+"""
+import glob
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+
+DATASET_DIR = "wnba_game_logs"
+
+# explicit schema with compact dtypes (counting stats fit easily in int16)
+SCHEMA = pa.schema([
+    ("SEASON_YEAR",       pa.int16()),
+    ("PLAYER_ID",         pa.int32()),
+    ("PLAYER_NAME",       pa.string()),
+    ("TEAM_ABBREVIATION", pa.string()),
+    ("GAME_ID",           pa.string()),   # keeps leading zeros
+    ("GAME_DATE",         pa.timestamp("s")),
+    ("MATCHUP",           pa.string()),
+    ("WL",                pa.string()),
+    ("MIN",               pa.float32()),
+    ("FGM",  pa.int16()), ("FGA",  pa.int16()), ("FG_PCT",  pa.float32()),
+    ("FG3M", pa.int16()), ("FG3A", pa.int16()), ("FG3_PCT", pa.float32()),
+    ("FTM",  pa.int16()), ("FTA",  pa.int16()), ("FT_PCT",  pa.float32()),
+    ("OREB", pa.int16()), ("DREB", pa.int16()), ("REB",     pa.int16()),
+    ("AST",  pa.int16()), ("TOV",  pa.int16()), ("STL",     pa.int16()),
+    ("BLK",  pa.int16()), ("BLKA", pa.int16()), ("PF",      pa.int16()),
+    ("PFD",  pa.int16()), ("PTS",  pa.int16()), ("PLUS_MINUS", pa.int16()),
+])
+PARTITIONING = ds.partitioning(
+    pa.schema([SCHEMA.field("SEASON_YEAR"), SCHEMA.field("TEAM_ABBREVIATION")]), flavor="hive"
+)
+
+
+def to_table(df: pd.DataFrame) -> pa.Table:
+    """Cast a crawler frame (string season, float64/int64 stats) onto SCHEMA."""
+    df = df.copy()
+    df["SEASON_YEAR"] = df["SEASON_YEAR"].astype(int)
+    for name in SCHEMA.names:
+        if name not in df.columns:
+            df[name] = None
+    return pa.Table.from_pandas(df[SCHEMA.names], schema=SCHEMA, preserve_index=False, safe=False)
+
+
+def player_files(pid: str, season, base_dir: str = DATASET_DIR) -> list[str]:
+    """A player-season's files, one per team partition the player appeared in."""
+    return glob.glob(os.path.join(base_dir, f"SEASON_YEAR={int(season)}", "*", f"player_{pid}-*.parquet"))
+
+
+def read_player(pid: str, season, base_dir: str = DATASET_DIR) -> pd.DataFrame | None:
+    """One player-season's stored rows, read from its own files only (None if it has none)."""
+    files = player_files(pid, season, base_dir)
+    if not files:
+        return None
+    dataset = ds.dataset(files, format="parquet", partitioning=PARTITIONING, partition_base_dir=base_dir)
+    return dataset.to_table().select(SCHEMA.names).to_pandas()
+
+
+def write_player(df: pd.DataFrame, pid: str, base_dir: str = DATASET_DIR):
+    """Write (or replace) one player-season's rows; file names are keyed by player so re-pulls overwrite."""
+    for season in df["SEASON_YEAR"].unique():
+        for path in player_files(pid, season, base_dir):
+            os.remove(path)  # a team the player no longer appears for would otherwise keep stale rows
+    # one write per team so every partition gets exactly player_<pid>-0.parquet
+    for _, team_df in df.groupby("TEAM_ABBREVIATION", sort=False):
+        ds.write_dataset(
+            to_table(team_df), base_dir, format="parquet", partitioning=PARTITIONING,
+            basename_template=f"player_{pid}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+
+def window_files(season, start: str, base_dir: str = DATASET_DIR) -> list[str]:
+    """A bulk window's files, one per team partition; start is the window's first day as YYYYMMDD."""
+    return glob.glob(os.path.join(base_dir, f"SEASON_YEAR={int(season)}", "*", f"window_{start}-*.parquet"))
+
+
+def write_window(df: pd.DataFrame, season, start: str, base_dir: str = DATASET_DIR):
+    """Write (or replace) one bulk window's rows in a single pass: one file per team partition, named by the
+    window's first day so a re-pulled (or grown) window overwrites its own files."""
+    for path in window_files(season, start, base_dir):
+        os.remove(path)
+    if df.empty:
+        return
+    ds.write_dataset(
+        to_table(df), base_dir, format="parquet", partitioning=PARTITIONING,
+        basename_template=f"window_{start}-{{i}}.parquet", existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def remove_season(season, base_dir: str = DATASET_DIR):
+    """Drop every stored file of a season (before a full re-pull)."""
+    for path in glob.glob(os.path.join(base_dir, f"SEASON_YEAR={int(season)}", "*", "*.parquet")):
+        os.remove(path)
+
+
+def open_dataset(base_dir: str = DATASET_DIR) -> ds.Dataset:
+    return ds.dataset(base_dir, format="parquet", partitioning=PARTITIONING)
+
+
+def _filter(seasons=None, teams=None, since=None):
+    exprs = []
+    if seasons:
+        exprs.append(ds.field("SEASON_YEAR").isin([int(s) for s in seasons]))
+    if teams:
+        exprs.append(ds.field("TEAM_ABBREVIATION").isin(list(teams)))
+    if since is not None:
+        exprs.append(ds.field("GAME_DATE") >= pa.scalar(pd.Timestamp(since), pa.timestamp("s")))
+    expr = None
+    for e in exprs:
+        expr = e if expr is None else expr & e
+    return expr
+
+
+def load_game_logs(base_dir: str = DATASET_DIR, seasons=None, teams=None, columns=None,
+                   since=None) -> pd.DataFrame:
+    """Read only the requested season/team partitions, columns and games on or after `since`, in SCHEMA column order."""
+    if columns is not None:
+        columns = [c for c in SCHEMA.names if c in columns]
+    table = open_dataset(base_dir).to_table(columns=columns, filter=_filter(seasons, teams, since))
+    order = [c for c in SCHEMA.names if c in table.column_names]
+    return table.select(order).to_pandas()
+
+
+def export_csv(out_csv: str, base_dir: str = DATASET_DIR, seasons=None) -> int:
+    """Stream the dataset to a single CSV batch by batch; returns rows written."""
+    dataset = open_dataset(base_dir)
+    rows = 0
+    with pacsv.CSVWriter(out_csv, SCHEMA) as writer:
+        for batch in dataset.to_batches(filter=_filter(seasons)):
+            batch = pa.Table.from_batches([batch]).select(SCHEMA.names).cast(SCHEMA)
+            writer.write_table(batch)
+            rows += batch.num_rows
+    return rows
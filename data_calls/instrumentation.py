@@ -0,0 +1,264 @@
+"""
+Lightweight run instrumentation for the crawler, pre_processing and the ml/ scripts: stage timers
+(context manager or decorator) with row counts and RSS, HTTP latency/retry histograms fed by FetchEngine,
+and one structured JSON report per run so stage times can be compared from run to run.
+
+    with run_report("preprocess"):            # writes run_reports/preprocess_<timestamp>.json on exit
+        with stage("load_logs") as s:
+            df = load_game_logs(...)
+            s.rows = len(df)
+
+    @timed("derive")                          # same record, for a whole function
+    def derive(...): ...
+
+Set PROFILE=cprofile (or PROFILE=pyinstrument, if installed) to also dump a profile next to the report.
+Compare runs: python instrumentation.py                  (the newest report against the previous one of its name)
+              python instrumentation.py old.json new.json
+"""
+import glob
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+# CONFIG
+REPORT_DIR = "run_reports"                    # one JSON report (and optional profile) per run
+PROFILE = os.environ.get("PROFILE", "")       # "", "cprofile" or "pyinstrument"
+LATENCY_BUCKETS_MS = [25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]  # histogram upper bounds; the rest is "+inf"
+
+
+def peak_rss_mb() -> float:
+    """Process high-water mark (ru_maxrss is bytes on macOS, KiB on Linux)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:  # no procfs (macOS): the peak is the best cheap answer
+        return peak_rss_mb()
+
+
+class Stage:
+    """Handle yielded by stage(); set .rows (or add other counters to .extra) inside the block."""
+
+    def __init__(self, name: str, rows: int | None = None):
+        self.name = name
+        self.rows = rows
+        self.extra = {}
+
+
+class HttpStats:
+    """Thread-safe per-label request latencies, status codes and retries per call."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.labels = {}
+
+    def _entry(self, label: str) -> dict:
+        return self.labels.setdefault(label, {"latencies_ms": [], "statuses": {}, "errors": 0, "retries": {}})
+
+    def attempt(self, label: str, seconds: float, status: int | None):
+        """One HTTP attempt; status None means a connection error or timeout."""
+        with self.lock:
+            e = self._entry(label)
+            e["latencies_ms"].append(1000 * seconds)
+            if status is None:
+                e["errors"] += 1
+            else:
+                e["statuses"][str(status)] = e["statuses"].get(str(status), 0) + 1
+
+    def call(self, label: str, retries: int):
+        """One logical get(), after all of its retries."""
+        with self.lock:
+            e = self._entry(label)
+            e["retries"][str(retries)] = e["retries"].get(str(retries), 0) + 1
+
+    def summary(self) -> dict:
+        out = {}
+        with self.lock:
+            for label, e in self.labels.items():
+                lat = sorted(e["latencies_ms"])
+                counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+                for ms in lat:
+                    counts[next((i for i, b in enumerate(LATENCY_BUCKETS_MS) if ms <= b), -1)] += 1
+                pct = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))], 1) if lat else None
+                out[label] = {
+                    "attempts": len(lat), "calls": sum(e["retries"].values()), "errors": e["errors"],
+                    "statuses": e["statuses"], "retries_per_call": dict(sorted(e["retries"].items(), key=lambda kv: int(kv[0]))),
+                    "latency_ms": {"p50": pct(0.5), "p90": pct(0.9), "p99": pct(0.99), "max": pct(1.0)},
+                    "latency_histogram_ms": dict(zip([f"<={b}" for b in LATENCY_BUCKETS_MS] + ["+inf"], counts)),
+                }
+        return out
+
+
+HTTP = HttpStats()  # process-wide; FetchEngine records into it unless given its own
+
+
+class Run:
+    """Stage records of one run, aggregated by nested stage path (repeated calls add up)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = datetime.now()
+        self.t0 = time.perf_counter()
+        self.stages = {}
+        self.path = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, rows: int | None = None):
+        s = Stage(name, rows)
+        self.path.append(name)
+        key = "/".join(self.path)
+        start, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield s
+        finally:
+            seconds, cpu = time.perf_counter() - start, time.process_time() - cpu
+            self.path.pop()
+            with self.lock:
+                rec = self.stages.setdefault(key, {"calls": 0, "seconds": 0.0, "cpu_seconds": 0.0, "rows": None})
+                rec["calls"] += 1
+                rec["seconds"] += seconds
+                rec["cpu_seconds"] += cpu
+                if s.rows is not None:
+                    rec["rows"] = (rec["rows"] or 0) + int(s.rows)
+                rec["rss_mb"] = round(rss_mb(), 1)
+                rec["peak_rss_mb"] = round(peak_rss_mb(), 1)
+                for k, v in s.extra.items():
+                    rec[k] = rec.get(k, 0) + v if isinstance(v, (int, float)) else v
+
+    def to_dict(self) -> dict:
+        stages = {}
+        for key, rec in self.stages.items():
+            rec = dict(rec, seconds=round(rec["seconds"], 4), cpu_seconds=round(rec["cpu_seconds"], 4))
+            if rec["rows"] and rec["seconds"] > 0:
+                rec["rows_per_s"] = round(rec["rows"] / rec["seconds"], 1)
+            stages[key] = rec
+        return {"name": self.name, "started": self.started.isoformat(timespec="seconds"),
+                "argv": sys.argv, "pid": os.getpid(), "cpus": os.cpu_count(),
+                "seconds": round(time.perf_counter() - self.t0, 4), "peak_rss_mb": round(peak_rss_mb(), 1),
+                "stages": stages, "http": HTTP.summary()}
+
+
+_run = Run(os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0])  # replaced by run_report()
+
+
+@contextmanager
+def stage(name: str, rows: int | None = None):
+    """Time a block as a stage of the current run (nested stages are recorded as parent/child)."""
+    with _run.stage(name, rows) as s:
+        yield s
+
+
+def timed(name: str | None = None, rows=None):
+    """Decorator form of stage(); rows(result) may count the rows a call produced."""
+    def wrap(fn):
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            with stage(name or fn.__name__) as s:
+                result = fn(*args, **kwargs)
+                if rows is not None:
+                    s.rows = rows(result)
+                return result
+        return inner
+    return wrap
+
+
+def _start_profiler(kind: str):
+    if kind == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+    if kind == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("PROFILE=pyinstrument needs `pip install pyinstrument`; running without a profile", file=sys.stderr)
+            return None
+        profiler = Profiler()
+        profiler.start()
+        return profiler
+    return None
+
+
+def _stop_profiler(profiler, base: str) -> str | None:
+    if profiler is None:
+        return None
+    if hasattr(profiler, "dump_stats"):
+        profiler.disable()
+        profiler.dump_stats(base + ".prof")  # inspect with: python -m pstats <file> / snakeviz
+        return base + ".prof"
+    profiler.stop()
+    with open(base + ".html", "w") as f:
+        f.write(profiler.output_html())
+    return base + ".html"
+
+
+@contextmanager
+def run_report(name: str, report_dir: str = REPORT_DIR, profile: str = PROFILE):
+    """Collect stages and HTTP stats for one run and write <report_dir>/<name>_<timestamp>.json on exit
+    (also when the run fails, with the error recorded)."""
+    global _run
+    _run = Run(name)
+    profiler = _start_profiler(profile)
+    error = None
+    try:
+        yield _run
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        os.makedirs(report_dir, exist_ok=True)
+        base = os.path.join(report_dir, f"{name}_{_run.started:%Y%m%d_%H%M%S}")
+        report = _run.to_dict() | {"error": error, "profile": _stop_profiler(profiler, base)}
+        with open(base + ".json", "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"Run report: {base}.json ({report['seconds']:.2f}s, peak RSS {report['peak_rss_mb']:.0f} MB)",
+              file=sys.stderr)
+
+
+def compare(old: dict, new: dict) -> list[str]:
+    """Stage-by-stage seconds and peak RSS of two reports, slowest new stages first."""
+    lines = [f"{old['name']}: {old['started']} -> {new['started']}",
+             f"{'stage':<40}{'old s':>10}{'new s':>10}{'change':>9}{'rows':>10}{'peak MB':>9}"]
+    top = lambda r: sum(v["seconds"] for k, v in r["stages"].items() if "/" not in k)
+    rows = [("(total)", old["seconds"], new["seconds"], None, new["peak_rss_mb"]),
+            ("(outside stages)", old["seconds"] - top(old), new["seconds"] - top(new), None, new["peak_rss_mb"])]
+    rows += sorted(((k, old["stages"].get(k, {}).get("seconds"), v["seconds"], v.get("rows"), v["peak_rss_mb"])
+                    for k, v in new["stages"].items()), key=lambda r: -r[2])
+    for key, a, b, n, peak in rows:
+        change = f"{100 * (b - a) / a:+.0f}%" if a else "new"
+        a = f"{a:.3f}" if a is not None else "-"
+        lines.append(f"{key:<40}{a:>10}{b:>10.3f}{change:>9}{n if n is not None else '':>10}{peak:>9.0f}")
+    return lines
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:]
+    if not paths:
+        reports = sorted(glob.glob(os.path.join(REPORT_DIR, "*.json")), key=os.path.getmtime)
+        if not reports:
+            sys.exit(f"no reports in {REPORT_DIR}/")
+        prefix = os.path.basename(reports[-1]).rsplit("_", 2)[0] + "_"
+        paths = [p for p in reports if os.path.basename(p).startswith(prefix)][-2:]
+    if len(paths) == 1:
+        print(f"only one {os.path.basename(paths[0]).rsplit('_', 2)[0]} report; comparing it with itself")
+    with open(paths[0]) as f:
+        old = json.load(f)
+    with open(paths[-1]) as f:
+        new = json.load(f)
+    print("\n".join(compare(old, new)))
+    for label, h in new["http"].items():
+        print(f"\nHTTP {label}: {h['calls']} calls, {h['attempts']} attempts, latency ms {h['latency_ms']}")
+        print(f"  histogram {h['latency_histogram_ms']}")
+        print(f"  retries per call {h['retries_per_call']}, statuses {h['statuses']}, errors {h['errors']}")
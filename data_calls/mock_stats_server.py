@@ -0,0 +1,208 @@
+"""
+Local stand-in for the stats.wnba.com endpoints used by the crawler, for offline testing.
+Serves /stats/commonallplayers and /stats/playergamelogs from a deterministic synthetic league,
+with optional latency and injected 429/503 responses to exercise the fetch engine's backoff.
+
+Run:  python mock_stats_server.py --port 8765 --fail-rate 0.1
+Then: WNBA_STATS_BASE_URL=http://127.0.0.1:8765 python season_list_box_scores.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TEAMS = ["ATL", "CHI", "CON", "DAL", "GSV", "IND", "LAS", "LVA", "MIN", "NYL", "PHO", "SEA", "WSH"]
+PLAYERS_PER_TEAM = 12
+GAMES_PER_TEAM   = 40
+SEASON_START     = (5, 16)   # (month, day) of opening night
+LOG_HEADERS = [
+    "SEASON_YEAR","PLAYER_ID","PLAYER_NAME","TEAM_ABBREVIATION",
+    "GAME_ID","GAME_DATE","MATCHUP","WL","MIN","FGM","FGA","FG_PCT",
+    "FG3M","FG3A","FG3_PCT","FTM","FTA","FT_PCT","OREB","DREB","REB",
+    "AST","TOV","STL","BLK","BLKA","PF","PFD","PTS","PLUS_MINUS"
+]
+
+
+def build_league(seasons, seed: int = 7):
+    """Return (players, logs): roster rows and game-log rows for every season."""
+    rng = random.Random(seed)
+    players, logs = [], []
+    for s_idx, season in enumerate(seasons):
+        year = int(season)
+        start = date(year, *SEASON_START)
+        roster = {}
+        for t_idx, team in enumerate(TEAMS):
+            roster[team] = []
+            for k in range(PLAYERS_PER_TEAM):
+                pid = 1_600_000 + t_idx * 100 + k
+                roster[team].append(pid)
+                if s_idx == 0:
+                    players.append([pid, f"Player {team} {k}", seasons[0], seasons[-1], team])
+        # round-robin pairings, one slate every other day
+        game_no = 0
+        for rnd in range(GAMES_PER_TEAM):
+            order = TEAMS[:]
+            rng.shuffle(order)
+            day = start + timedelta(days=2 * rnd)
+            for home, away in zip(order[0::2], order[1::2]):
+                game_no += 1
+                game_id = f"10{year % 100:02d}{game_no:05d}"
+                home_pts = away_pts = 0
+                rows = []
+                for team, opp, sign in ((home, away, "vs."), (away, home, "@")):
+                    for pid in roster[team]:
+                        if rng.random() < 0.15:
+                            continue  # did not play
+                        fga = rng.randint(0, 18)
+                        fgm = rng.randint(0, fga)
+                        fg3a = rng.randint(0, min(fga, 8))
+                        fg3m = rng.randint(0, min(fg3a, fgm))
+                        fta = rng.randint(0, 8)
+                        ftm = rng.randint(0, fta)
+                        oreb, dreb = rng.randint(0, 4), rng.randint(0, 8)
+                        pts = 2 * (fgm - fg3m) + 3 * fg3m + ftm
+                        if team == home:
+                            home_pts += pts
+                        else:
+                            away_pts += pts
+                        rows.append([
+                            season, pid, f"Player {team} {k_of(pid)}", team, game_id,
+                            day.strftime("%Y-%m-%dT00:00:00"), f"{team} {sign} {opp}", None,
+                            round(rng.uniform(5, 36), 2), fgm, fga, pct(fgm, fga),
+                            fg3m, fg3a, pct(fg3m, fg3a), ftm, fta, pct(ftm, fta),
+                            oreb, dreb, oreb + dreb, rng.randint(0, 9), rng.randint(0, 5),
+                            rng.randint(0, 3), rng.randint(0, 3), rng.randint(0, 2),
+                            rng.randint(0, 5), rng.randint(0, 5), pts, rng.randint(-20, 20),
+                        ])
+                for row in rows:
+                    won = (row[3] == home) == (home_pts >= away_pts)
+                    row[7] = "W" if won else "L"
+                logs.extend(rows)
+    return players, logs
+
+
+def k_of(pid: int) -> int:
+    return pid % 100
+
+
+def pct(made: int, att: int):
+    return round(made / att, 3) if att else 0.0
+
+
+def parse_date(value: str):
+    """Accept the MM/DD/YYYY format the real API uses (and ISO as a convenience)."""
+    if not value:
+        return None
+    if "/" in value:
+        m, d, y = value.split("/")
+        return date(int(y), int(m), int(d))
+    return date.fromisoformat(value[:10])
+
+
+class StatsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    league = None
+    latency = 0.0
+    fail_rate = 0.0
+    retry_after = 1
+    rng = random.Random()             # failure injection; seeded by serve() for reproducible runs
+    request_count = 0
+    failures = {}                     # injected status -> count
+    connections = set()               # client (host, port) pairs seen, i.e. TCP connections opened
+    count_lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: dict | None = None, headers: dict | None = None):
+        payload = json.dumps(body or {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        with StatsHandler.count_lock:
+            StatsHandler.request_count += 1
+            StatsHandler.connections.add(self.client_address)
+            fail = None
+            if parsed.path != "/" and self.rng.random() < self.fail_rate:
+                fail = 429 if self.rng.random() < 0.5 else 503
+                StatsHandler.failures[fail] = StatsHandler.failures.get(fail, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        q = {k: v[0] for k, v in parse_qs(parsed.query, keep_blank_values=True).items()}
+        if fail == 429:
+            return self._send(429, {"message": "Too Many Requests"}, {"Retry-After": str(self.retry_after)})
+        if fail == 503:
+            return self._send(503, {"message": "Service Unavailable"})
+        if parsed.path == "/":
+            return self._send(200, {})
+        if parsed.path == "/stats/commonallplayers":
+            return self._send(200, self.all_players())
+        if parsed.path == "/stats/playergamelogs":
+            return self._send(200, self.game_logs(q))
+        return self._send(404, {"message": "not found"})
+
+    def all_players(self):
+        headers = ["PERSON_ID", "DISPLAY_FIRST_LAST", "FROM_YEAR", "TO_YEAR", "TEAM_ABBREVIATION"]
+        players, _ = self.league
+        return {"resultSets": [{"name": "CommonAllPlayers", "headers": headers, "rowSet": players}]}
+
+    def game_logs(self, q: dict):
+        _, logs = self.league
+        season = q.get("Season", "")
+        pid = q.get("PlayerID", "")
+        date_from, date_to = parse_date(q.get("DateFrom", "")), parse_date(q.get("DateTo", ""))
+        rows = []
+        for row in logs:
+            if row[0] != season or (pid and str(row[1]) != pid):
+                continue
+            day = date.fromisoformat(row[5][:10])
+            if (date_from and day < date_from) or (date_to and day > date_to):
+                continue
+            rows.append(row)
+        return {"resultSets": [{"name": "PlayerGameLogs", "headers": LOG_HEADERS, "rowSet": rows}]}
+
+
+def serve(port: int = 8765, seasons=("2024", "2025"), latency: float = 0.0, fail_rate: float = 0.0,
+          retry_after: int = 1, seed: int | None = None):
+    """Start the stand-in server on a daemon thread and return it (call .shutdown() to stop).
+    port=0 picks a free port (server.server_address[1]); counters are reset on every call."""
+    StatsHandler.league = build_league(list(seasons))
+    StatsHandler.latency = latency
+    StatsHandler.fail_rate = fail_rate
+    StatsHandler.retry_after = retry_after
+    StatsHandler.rng = random.Random(seed)
+    StatsHandler.request_count = 0
+    StatsHandler.failures = {}
+    StatsHandler.connections = set()
+    server = ThreadingHTTPServer(("127.0.0.1", port), StatsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seasons", nargs="+", default=["2024", "2025"])
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered 429/503")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--seed", type=int, help="seed the injected failures")
+    args = parser.parse_args()
+    server = serve(args.port, args.seasons, args.latency, args.fail_rate, args.retry_after, args.seed)
+    print(f"Mock stats server on http://127.0.0.1:{args.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,144 @@
+"""
+Persisted per-player history index over the feature store, used by gather_model_inputs.py.
+player_index/ holds the store's rows re-sorted by (PLAYER_ID, GAME_DATE) so every player's games are one
+contiguous slice, an offsets table keyed by player id and name, and a (player, opponent) secondary index:
+row positions sorted by (PLAYER_ID, OPP, GAME_DATE) with their own offsets. Files are uncompressed Arrow
+IPC read through a memory map, so a lookup only materializes that player's rows. The index is rebuilt
+when the feature store has changed since it was written.
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+from feature_store import FEATURE_STORE, read_table
+from pre_processing import ROLLING_SPECS
+from rolling_features import RollingSpec, next_game_value
+
+INDEX_DIR = "player_index"
+HISTORY_COLUMNS = ["PLAYER_ID", "PLAYER_NAME", "TEAM_ABBREVIATION", "SEASON_YEAR", "GAME_DATE",
+                   "OPP", "HOME_AWAY", "PTS"]
+
+
+def _write(table: pa.Table, path: str):
+    tmp = path + ".tmp"
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, path)
+
+
+def _offsets(keys: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """Start/stop of each run of equal keys in already-sorted key arrays."""
+    n = len(keys[0])
+    change = np.zeros(n, dtype=bool)
+    change[:1] = True
+    for k in keys:
+        change[1:] |= k[1:] != k[:-1]
+    start = np.flatnonzero(change)
+    return start, np.append(start[1:], n)
+
+
+def _store_stamp(store_path: str) -> dict:
+    st = os.stat(store_path)
+    return {"store": os.path.abspath(store_path), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def build_index(store_path: str = FEATURE_STORE, index_dir: str = INDEX_DIR):
+    """Sort the store by player and date once and write the history, player and (player, opp) tables."""
+    columns = list(dict.fromkeys(HISTORY_COLUMNS + [RollingSpec(*s).column for s in ROLLING_SPECS]))
+    table = read_table(store_path, columns)
+    history = table.take(pc.sort_indices(table, [("PLAYER_ID", "ascending"), ("GAME_DATE", "ascending")]))
+    pid = history.column("PLAYER_ID").to_numpy()
+    start, stop = _offsets([pid])
+    names = history.column("PLAYER_NAME").to_pandas().astype(str).to_numpy()
+    players = pa.table({"PLAYER_ID": pid[start], "PLAYER_NAME": names[stop - 1],  # latest name spelling
+                        "start": start, "stop": stop})
+
+    # secondary index: rows of each (player, opponent), still in date order within the pair
+    opp = history.column("OPP").to_pandas().astype(str).to_numpy()
+    order = np.lexsort((np.arange(len(pid)), opp, pid))
+    o_start, o_stop = _offsets([pid[order], opp[order]])
+    by_opp = pa.table({"PLAYER_ID": pid[order][o_start], "OPP": opp[order][o_start],
+                       "start": o_start, "stop": o_stop})
+
+    os.makedirs(index_dir, exist_ok=True)
+    _write(history, os.path.join(index_dir, "history.arrow"))
+    _write(players, os.path.join(index_dir, "players.arrow"))
+    _write(pa.table({"row": order.astype(np.int32)}), os.path.join(index_dir, "opp_rows.arrow"))
+    _write(by_opp, os.path.join(index_dir, "by_opp.arrow"))
+    with open(os.path.join(index_dir, "index.json"), "w") as f:
+        json.dump(_store_stamp(store_path) | {"rows": history.num_rows, "players": players.num_rows}, f, indent=1)
+
+
+def is_stale(store_path: str = FEATURE_STORE, index_dir: str = INDEX_DIR) -> bool:
+    meta_path = os.path.join(index_dir, "index.json")
+    if not os.path.exists(meta_path):
+        return True
+    with open(meta_path) as f:
+        meta = json.load(f)
+    stamp = _store_stamp(store_path)
+    return (meta["mtime_ns"], meta["size"]) != (stamp["mtime_ns"], stamp["size"])
+
+
+class PlayerIndex:
+    """Per-player game history and next-game rolling features, O(games for that player) per lookup."""
+
+    def __init__(self, index_dir: str = INDEX_DIR, store_path: str = FEATURE_STORE):
+        if is_stale(store_path, index_dir):
+            build_index(store_path, index_dir)
+        self.history = read_table(os.path.join(index_dir, "history.arrow"))
+        self.opp_rows = read_table(os.path.join(index_dir, "opp_rows.arrow")).column("row").to_numpy()
+        players = read_table(os.path.join(index_dir, "players.arrow")).to_pandas()
+        by_opp = read_table(os.path.join(index_dir, "by_opp.arrow")).to_pandas()
+        self.spans = dict(zip(players["PLAYER_ID"], zip(players["start"], players["stop"])))
+        self.name_to_id = dict(zip(players["PLAYER_NAME"], players["PLAYER_ID"]))
+        self.opp_spans = dict(zip(zip(by_opp["PLAYER_ID"], by_opp["OPP"]), zip(by_opp["start"], by_opp["stop"])))
+
+    def player_id(self, player) -> int:
+        """Resolve a player id or exact PLAYER_NAME; unknown players raise KeyError."""
+        if str(player).isdigit() and int(player) in self.spans:
+            return int(player)
+        if player in self.name_to_id:
+            return int(self.name_to_id[player])
+        raise KeyError(f"unknown player: {player}")
+
+    def games(self, player) -> pd.DataFrame:
+        """The player's games, oldest first."""
+        start, stop = self.spans[self.player_id(player)]
+        return self.history.slice(start, stop - start).to_pandas()
+
+    def games_vs(self, player, opp: str) -> pd.DataFrame:
+        """The player's games against opp, oldest first (empty if they never met)."""
+        start, stop = self.opp_spans.get((self.player_id(player), opp), (0, 0))
+        return self.history.take(self.opp_rows[start:stop]).to_pandas()
+
+    def next_game(self, player, opp: str | None = None, today: pd.Timestamp | None = None) -> dict:
+        """Rolling features for the player's next game, computed exactly as pre_processing does for
+        training rows (ROLLING_SPECS through the same engine), plus recency context."""
+        games = self.games(player)
+        vs = self.games_vs(player, opp) if opp is not None else games.iloc[:0]
+        last = games.iloc[-1]
+        today = pd.Timestamp.today().normalize() if today is None else pd.Timestamp(today)
+        row = {"PLAYER_ID": int(last["PLAYER_ID"]), "PLAYER_NAME": str(last["PLAYER_NAME"]),
+               "TEAM_ABBREVIATION": str(last["TEAM_ABBREVIATION"]), "OPP": opp, "games": len(games),
+               "games_vs_opp": len(vs), "last_game_date": last["GAME_DATE"],
+               "days_since_last_game": (today - last["GAME_DATE"]).days}
+        for spec in map(lambda s: RollingSpec(*s), ROLLING_SPECS):
+            if tuple(spec.keys) == ("PLAYER_ID",):
+                row[spec.name] = next_game_value(games[spec.column].to_numpy(dtype=float), spec)
+            elif tuple(spec.keys) == ("PLAYER_ID", "OPP"):
+                row[spec.name] = next_game_value(vs[spec.column].to_numpy(dtype=float), spec) if opp else np.nan
+            else:
+                raise ValueError(f"player index can't serve rolling keys {spec.keys}")
+        return row
+
+    def lookup(self, players, opp: str | None = None, today=None) -> tuple[pd.DataFrame, list]:
+        """next_game() for many players: (one row per found player, list of players not found)."""
+        rows, missing = [], []
+        for player in players:
+            try:
+                rows.append(self.next_game(player, opp, today))
+            except KeyError:
+                missing.append(player)
+        return pd.DataFrame(rows), missing
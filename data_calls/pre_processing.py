@@ -1,121 +1,328 @@
 """
-Post-processes a WNBA game-logs CSV: filters by games played and computes days since last game.
+Post-processes the WNBA game-logs dataset: filters by games played and computes days since last game.
 Configure input, output file names and thresholds in the CONFIG section below.
+
+Full rebuild:   python pre_processing.py
+Nightly append: python pre_processing.py --append   (only games not yet in the saved state)
+Check append:   python pre_processing.py --verify   (replays the last nights through append mode
+                                                     and asserts the result equals a full rebuild)
+Each run writes its stage timings, row counts and peak RSS to run_reports/ (see instrumentation.py).
 """
+import argparse
+import os
+import tempfile
 import pandas as pd
+import pyarrow.feather as feather
+from game_log_dataset import load_game_logs
+from feature_store import FEATURE_STORE, write_features, load_features, to_table
+from feature_derivation import parse_matchup, team_box_totals, team_game_totals, point_in_time_context
+from rolling_features import RollingSpec, add_rolling_features
+from schedule_features import fatigue_features, schedule_tail, team_schedule
+from usage_features import COMPONENTS, add_usage_components, add_usage_rates, usage_specs
+from instrumentation import run_report, stage, timed
 
-INPUT_CSV    = "wnba_all_players_2024_2025.csv"  # Path to your combined logs CSV
-OUTPUT_CSV   = "processed_2024_2025.csv"         # Path to save the filtered CSV
+INPUT_DATASET = "wnba_game_logs"                  # Partitioned dataset written by season_list_box_scores.py
+SEASONS      = ["2024", "2025"]                   # Season partitions to load
+OUTPUT_STORE = FEATURE_STORE                      # Arrow feature store read by gather_model_inputs.py and ml/
+STATE_DIR    = "feature_state"                    # Rolling state kept for --append runs
+OUTPUT_CSV   = "processed_2024_2025.csv"         # Path to save the filtered CSV (only if WRITE_CSV)
+WRITE_CSV    = False                              # Opt-in CSV copy for inspection
 MIN_GAMES    = 15                                 # Minimum number of games to include a player
 DEFAULT_DAYS = 5                                  # Default days_since_last_game for first game
-DROP_COLUMNS = ["GAME_ID", "FGM", "FGA", "FG_PCT", 
-                "FG3M", "FG3A", "FG3_PCT", "FTM", 
-                "FTA", "FT_PCT", "OREB", "DREB",
-                "REB", "AST", "TOV", "STL", "BLK",
+DROP_COLUMNS = ["GAME_ID", "FGM", "FG_PCT",
+                "FG3M", "FG3A", "FG3_PCT", "FTM",
+                "FT_PCT", "DREB",
+                "REB", "AST", "STL", "BLK",
                 "BLKA", "PF", "PFD", "PLUS_MINUS"]      # List of column names to remove from final output
+ROLLING_SPECS = [                                 # (output, group keys, column, window[, "mean"|"ewm"])
+    ("avg_prev_5",     ("PLAYER_ID",),        "PTS", 5),
+    ("avg_prev_15",    ("PLAYER_ID",),        "PTS", 15),
+    ("avg_prev_opp_3", ("PLAYER_ID", "OPP"),  "PTS", 3),
+]
+FATIGUE_WINDOWS = [3, 7]                          # days: games_last_{n}d / km_last_{n}d (plus travel_km, back_to_back)
+USAGE_WINDOW = 10                                 # previous games behind usg_pct / ts_pct / pts_per_min / pts_per_100_prev_{n}
+USAGE_SPECS  = usage_specs(USAGE_WINDOW)          # rolled rate components (usage_features.py), stored in the state only
+INPUT_COLUMNS = ["SEASON_YEAR", "PLAYER_ID", "PLAYER_NAME", "TEAM_ABBREVIATION", "GAME_ID",
+                 "GAME_DATE", "MATCHUP", "WL", "MIN", "PTS",
+                 "FGA", "FTA", "OREB", "TOV"]             # box-score columns behind pace / defensive rating / usage
+
+
+def add_rest_features(df: pd.DataFrame, team_last: pd.Series | None = None) -> pd.DataFrame:
+    """team_rest_days / rest_diff from each team's schedule; team_last gives the last game
+    date per team before df (append mode), otherwise a team's first game gets DEFAULT_DAYS."""
+    # one row per team per game
+    team_rest = (
+        df.groupby(["GAME_ID", "TEAM_ABBREVIATION"], as_index=False, observed=True)
+        .agg({"GAME_DATE": "first"})
+        .sort_values(["TEAM_ABBREVIATION", "GAME_DATE"])
+    )
+    prev_date = team_rest.groupby("TEAM_ABBREVIATION", observed=True)["GAME_DATE"].shift(1)
+    if team_last is not None:
+        prev_date = prev_date.fillna(team_rest["TEAM_ABBREVIATION"].map(team_last))
+    team_rest["team_rest_days"] = (
+        (team_rest["GAME_DATE"] - prev_date)
+        .dt.days
+        .fillna(DEFAULT_DAYS)
+        .astype(int)
+    )
+    # Compute signed rest difference at team-game level
+    opponent_rest = (
+        team_rest.merge(team_rest, on="GAME_ID", suffixes=("", "_opp"))
+        .query("TEAM_ABBREVIATION != TEAM_ABBREVIATION_opp")
+    )
+    opponent_rest["rest_diff"] = (
+        opponent_rest["team_rest_days"] - opponent_rest["team_rest_days_opp"]
+    )
+    # Keep only necessary columns
+    opponent_rest = opponent_rest[["GAME_ID", "TEAM_ABBREVIATION", "team_rest_days", "rest_diff"]]
+    # team_rest_days for teams whose opponent is missing from df
+    team_rest = team_rest[["GAME_ID", "TEAM_ABBREVIATION", "team_rest_days"]].merge(
+        opponent_rest[["GAME_ID", "TEAM_ABBREVIATION", "rest_diff"]],
+        on=["GAME_ID", "TEAM_ABBREVIATION"], how="left"
+    )
+    # Merge with original df
+    return df.merge(team_rest, on=["GAME_ID", "TEAM_ABBREVIATION"], how="left")
+
+
+def add_context_features(df: pd.DataFrame, team_games: pd.DataFrame) -> pd.DataFrame:
+    """Opponent defensive rating and pace (poss/40) as of tip-off, from the season's earlier box scores."""
+    context = point_in_time_context(team_games)
+    context = context.rename(columns={"TEAM_ABBREVIATION": "OPP", "DEF_RATING": "OPP_DEF_RATING",
+                                      "PACE": "OPP_PACE"})
+    context["OPP"] = context["OPP"].astype(str)
+    return df.merge(context[["GAME_ID", "OPP", "OPP_DEF_RATING", "OPP_PACE"]],
+                    on=["GAME_ID", "OPP"], how="left")
+
+
+def add_fatigue_features(df: pd.DataFrame, schedule: pd.DataFrame, history: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Travel km, back-to-backs and games / km in the last FATIGUE_WINDOWS days, per team-game."""
+    fatigue = fatigue_features(schedule, FATIGUE_WINDOWS, history)
+    df = df.assign(_team=df["TEAM_ABBREVIATION"].astype(str))
+    return (df.merge(fatigue.rename(columns={"TEAM_ABBREVIATION": "_team"}), on=["GAME_ID", "_team"], how="left")
+            .drop(columns="_team"))
+
+
+def finalize(df: pd.DataFrame) -> pd.DataFrame:
+    # Drop unwanted columns
+    if DROP_COLUMNS:
+        df = df.drop(columns=DROP_COLUMNS + COMPONENTS, errors='ignore')
+    # Round to 5 decimal places
+    float_cols = df.select_dtypes(include="number").columns
+    df[float_cols] = df[float_cols].round(5)
+    return df
+
+
+def rolling_tail_columns() -> list[str]:
+    return sorted({c for s in ROLLING_SPECS + USAGE_SPECS for c in (*s[1], s[2])} | {"GAME_DATE"})
+
+
+def rolling_tail(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows still inside some rolling window: the last `window` games of every spec's group
+    (an EWMA never forgets, so "ewm" specs keep their whole history)."""
+    keep = pd.Series(False, index=df.index)
+    for spec in map(lambda s: RollingSpec(*s), ROLLING_SPECS + USAGE_SPECS):
+        if spec.kind != "mean":
+            return df[rolling_tail_columns()].reset_index(drop=True)
+        keep |= df.groupby(list(spec.keys), observed=True).cumcount(ascending=False) < spec.window
+    return df.loc[keep, rolling_tail_columns()].reset_index(drop=True)
+
+
+@timed("derive", rows=len)
+def derive(logs: pd.DataFrame, state: dict | None = None) -> pd.DataFrame:
+    """All per-row features for logs (every player, before the MIN_GAMES filter).
+    With state, rest days, rolling windows and team context continue from the saved history."""
+    df = logs.sort_values(["PLAYER_ID", "GAME_DATE"]).reset_index(drop=True)
+    df = add_rest_features(df, state["team_last"] if state else None)
+    box = team_box_totals(logs)  # the one per team-game groupby, shared by usage and opponent context
+
+    # Usage / shooting / per-possession parts of each game, rolled with the averages below
+    df = add_usage_components(df, box)
+
+    # Home/Away and opponent code, parsed once per distinct matchup
+    df["HOME_AWAY"], df["OPP"] = parse_matchup(df["MATCHUP"])
+
+    # Travel and schedule density from each team's sequence of venues
+    df = add_fatigue_features(df, team_schedule(df), state["schedule"] if state else None)
+
+    # Rolling averages over previous games (excludes current), all specs in one pass
+    specs = ROLLING_SPECS + USAGE_SPECS
+    if state is None:
+        add_rolling_features(df, specs)
+    else:
+        history = state["history"].assign(_row=-1)
+        combined = pd.concat([history, df[history.columns.drop("_row")].assign(_row=df.index)],
+                             ignore_index=True)
+        combined = combined.sort_values(["PLAYER_ID", "GAME_DATE"], kind="stable")
+        add_rolling_features(combined, specs)
+        new_rows = combined[combined["_row"] >= 0].set_index("_row").sort_index()
+        for spec in specs:
+            df[spec[0]] = new_rows[spec[0]].to_numpy()
+    df = add_usage_rates(df, USAGE_WINDOW)
+
+    team_games = team_game_totals(logs, box)
+    if state is not None:
+        team_games = pd.concat([state["team_games"], team_games], ignore_index=True)
+    return add_context_features(df, team_games)
+
+
+@timed("make_state")
+def make_state(logs: pd.DataFrame, features: pd.DataFrame, prev: dict | None = None) -> dict:
+    """Rolling state after `logs` (the newly processed rows, or everything on a full build)."""
+    history = features[rolling_tail_columns()]
+    games = logs.groupby("PLAYER_ID").size()
+    team_last = logs.groupby("TEAM_ABBREVIATION", observed=True)["GAME_DATE"].max()
+    team_games = team_game_totals(logs)
+    schedule = team_schedule(features)
+    if prev is not None:
+        team_games = pd.concat([prev["team_games"], team_games], ignore_index=True)
+        schedule = pd.concat([prev["schedule"], schedule], ignore_index=True)
+        history = pd.concat([prev["history"], history], ignore_index=True)
+        history = history.sort_values(["PLAYER_ID", "GAME_DATE"], kind="stable")
+        games = games.add(prev["games"], fill_value=0).astype(int)
+        team_last = pd.concat([prev["team_last"], team_last]).groupby(level=0).max()
+    through = logs["GAME_DATE"].max() if prev is None else max(prev["through"], logs["GAME_DATE"].max())
+    return {
+        "history": rolling_tail(history),
+        "games": games,
+        "team_last": team_last,
+        "team_games": team_games,
+        "schedule": schedule_tail(schedule, FATIGUE_WINDOWS),
+        "through": through,
+        "through_games": logs.loc[logs["GAME_DATE"] == through, ["PLAYER_ID", "GAME_ID"]].reset_index(drop=True),
+    }
+
+
+def build_features(logs: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """Full rebuild: returns (features for players with >= MIN_GAMES, pending rows of the rest, state)."""
+    derived = derive(logs)
+    state = make_state(logs, derived)
+    out = finalize(derived)
+    valid = out["PLAYER_ID"].map(state["games"]) >= MIN_GAMES
+    return out[valid].reset_index(drop=True), out[~valid].reset_index(drop=True), state
+
+
+def update_features(features: pd.DataFrame, pending: pd.DataFrame, state: dict,
+                    new_logs: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """Append mode: derive features for new_logs only, promote players who reach MIN_GAMES.
+    new_logs may repeat the rows already processed on the state's last date; any other row on or
+    before that date (a late box score) raises, since the rows after it would need re-deriving."""
+    keys = pd.MultiIndex.from_frame(new_logs[["PLAYER_ID", "GAME_ID"]])
+    seen = keys.isin(pd.MultiIndex.from_frame(state["through_games"])) & (new_logs["GAME_DATE"] == state["through"])
+    new_logs = new_logs[~seen]
+    if new_logs.empty:
+        return features, pending, state
+    late = new_logs["GAME_DATE"] <= state["through"]
+    if late.any():
+        raise ValueError(f"{late.sum()} unprocessed rows on or before {state['through']:%Y-%m-%d} "
+                         "(late box scores); run a full rebuild")
+    derived = derive(new_logs, state)
+    state = make_state(new_logs, derived, state)
+    new = finalize(derived)
+
+    candidates = pd.concat([pending, new], ignore_index=True)
+    valid = candidates["PLAYER_ID"].map(state["games"]) >= MIN_GAMES
+    features = pd.concat([features, candidates[valid]], ignore_index=True)
+    features = features.sort_values(["PLAYER_ID", "GAME_DATE"], kind="stable").reset_index(drop=True)
+    return features, candidates[~valid].reset_index(drop=True), state
+
+
+def save_state(state: dict, pending: pd.DataFrame, state_dir: str = STATE_DIR):
+    os.makedirs(state_dir, exist_ok=True)
+    feather.write_feather(state["history"], os.path.join(state_dir, "history.arrow"))
+    feather.write_feather(state["games"].rename("games").reset_index(), os.path.join(state_dir, "games.arrow"))
+    feather.write_feather(state["team_last"].rename("last_date").reset_index(),
+                          os.path.join(state_dir, "team_last.arrow"))
+    feather.write_feather(state["team_games"], os.path.join(state_dir, "team_games.arrow"))
+    feather.write_feather(state["schedule"], os.path.join(state_dir, "schedule.arrow"))
+    feather.write_feather(state["through_games"], os.path.join(state_dir, "through_games.arrow"))
+    write_features(pending, os.path.join(state_dir, "pending.arrow"))
+
+
+def load_state(state_dir: str = STATE_DIR) -> tuple[dict, pd.DataFrame]:
+    history = feather.read_feather(os.path.join(state_dir, "history.arrow"))
+    if not set(rolling_tail_columns()) <= set(history.columns):
+        raise FileNotFoundError(f"{state_dir}/history.arrow predates the usage features; run a full rebuild")
+    games = feather.read_feather(os.path.join(state_dir, "games.arrow")).set_index("PLAYER_ID")["games"]
+    team_last = (feather.read_feather(os.path.join(state_dir, "team_last.arrow"))
+                 .set_index("TEAM_ABBREVIATION")["last_date"])
+    team_games = feather.read_feather(os.path.join(state_dir, "team_games.arrow"))
+    if not os.path.exists(os.path.join(state_dir, "schedule.arrow")):
+        raise FileNotFoundError(f"{state_dir}/ predates the fatigue features; run a full rebuild")
+    schedule = feather.read_feather(os.path.join(state_dir, "schedule.arrow"))
+    if not os.path.exists(os.path.join(state_dir, "through_games.arrow")):
+        raise FileNotFoundError(f"{state_dir}/ predates late-row detection; run a full rebuild")
+    through_games = feather.read_feather(os.path.join(state_dir, "through_games.arrow"))
+    pending = load_features(os.path.join(state_dir, "pending.arrow"))
+    state = {"history": history, "games": games, "team_last": team_last, "team_games": team_games,
+             "schedule": schedule, "through": team_last.max(), "through_games": through_games}
+    return state, pending
+
+
+def save_outputs(features: pd.DataFrame, pending: pd.DataFrame, state: dict,
+                 store: str = OUTPUT_STORE, state_dir: str = STATE_DIR):
+    # Save the feature store (and optional CSV)
+    write_features(features, store)
+    save_state(state, pending, state_dir)
+    if WRITE_CSV:
+        features.to_csv(OUTPUT_CSV, index=False)
+
+
+def verify_append(logs: pd.DataFrame, nights: int = 10):
+    """Build on all but the last `nights` game dates, append them one night at a time through
+    the on-disk store/state, and assert the result equals a full rebuild."""
+    dates = sorted(logs["GAME_DATE"].unique())
+    cut = dates[-nights]
+    with tempfile.TemporaryDirectory() as tmp:
+        store, state_dir = os.path.join(tmp, "features.arrow"), os.path.join(tmp, "state")
+        features, pending, state = build_features(logs[logs["GAME_DATE"] < cut])
+        save_outputs(features, pending, state, store, state_dir)
+        for night in dates[-nights:]:
+            state, pending = load_state(state_dir)
+            features, pending, state = update_features(
+                load_features(store), pending, state, logs[logs["GAME_DATE"] == night]
+            )
+            save_outputs(features, pending, state, store, state_dir)
+        appended = load_features(store)
+    full, _, _ = build_features(logs)
+    expected = to_table(full)
+    actual = to_table(appended).select(expected.column_names)
+    # rolled sums start from the saved tail instead of the first game, so floats may differ in the
+    # last bit and a tie can round either way: allow one unit of finalize()'s 5 decimals (plus float32 storage)
+    pd.testing.assert_frame_equal(actual.to_pandas(), expected.to_pandas(), check_exact=False, rtol=0, atol=1.5e-5,
+                                  obj="append mode vs a full rebuild")
+    print(f"OK: {nights} nights appended, {len(appended)} rows equal to a full rebuild.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the processed feature store.")
+    parser.add_argument("--append", action="store_true", help="only process games not yet in the saved state")
+    parser.add_argument("--verify", action="store_true", help="check append mode against a full rebuild")
+    args = parser.parse_args()
 
-# Load the combined logs
-df = pd.read_csv(INPUT_CSV, parse_dates=["GAME_DATE"])
-
-# Filter players by games played
-game_counts = df.groupby("PLAYER_ID").size()
-valid_players = game_counts[game_counts >= MIN_GAMES].index
-filtered = df[df["PLAYER_ID"].isin(valid_players)].copy()
-
-# Sort by player and date
-filtered.sort_values(["PLAYER_ID", "GAME_DATE"], inplace=True)
-
-# Compute team_rest_days for each team-game
-team_rest = (
-    filtered.groupby(["GAME_ID", "TEAM_ABBREVIATION"], as_index=False)
-    .agg({"GAME_DATE": "first"})  # one row per team per game
-    .sort_values(["TEAM_ABBREVIATION", "GAME_DATE"])
-)
-team_rest["team_rest_days"] = (
-    team_rest.groupby("TEAM_ABBREVIATION")["GAME_DATE"]
-    .diff()
-    .dt.days
-    .fillna(DEFAULT_DAYS)
-    .astype(int)
-)
-# Compute signed rest difference at team-game level
-opponent_rest = (
-    team_rest.merge(team_rest, on="GAME_ID", suffixes=("", "_opp"))
-    .query("TEAM_ABBREVIATION != TEAM_ABBREVIATION_opp")
-)
-
-opponent_rest["rest_diff"] = (
-    opponent_rest["team_rest_days"] - opponent_rest["team_rest_days_opp"]
-)
-# Keep only necessary columns
-opponent_rest = opponent_rest[["GAME_ID", "TEAM_ABBREVIATION", "team_rest_days", "rest_diff"]]
-# Merge with original df
-filtered = filtered.merge(opponent_rest, on=["GAME_ID", "TEAM_ABBREVIATION"], how="left")
-
-# Compute rolling average points for previous games (excludes current)
-filtered["avg_prev_5"] = filtered.groupby("PLAYER_ID")["PTS"].transform(
-    lambda x: x.shift(1).rolling(window=5, min_periods=1).mean()
-)
-filtered["avg_prev_15"] = filtered.groupby("PLAYER_ID")["PTS"].transform(
-    lambda x: x.shift(1).rolling(window=15, min_periods=1).mean()
-)
-
-# Home/Away
-filtered["HOME_AWAY"] = filtered["MATCHUP"].apply(
-    lambda m: "Away" if "@" in m else "Home"
-)
-# Opponent code
-filtered["OPP"] = filtered["MATCHUP"].apply(lambda m: m.split()[-1])
-# Define defensive ratings by year
-def_ratings_2024 = {
-    "ATL": 99.4, "CHI": 108.3, "CON": 112.2, "DAL": 107.7, "IND": 100.6,
-    "GSV": 98.8, "LVA": 102.8, "LAS": 107.5, "MIN": 94.8,  "NYL": 97.7,
-    "PHO": 98.5, "SEA": 98.9,  "WSH": 100.1
-}
-def_ratings_2025 = {
-    "ATL": 100.1, "CHI": 103.5, "CON": 94.1, "DAL": 111.7, "IND": 107.5,
-    "LVA": 99.6, "LAS": 105.7, "MIN": 94.8, "NYL": 95.3,
-    "PHO": 105.4, "SEA": 96.4, "WSH": 101.7
-}
-# Add ratings based on year
-filtered["OPP_DEF_RATING"] = filtered.apply(
-    lambda row: def_ratings_2024.get(row["OPP"]) if row["SEASON_YEAR"] == 2024
-    else def_ratings_2025.get(row["OPP"]),
-    axis=1
-)
-# Rolling average vs same opponent
-filtered["avg_prev_opp_3"] = filtered.groupby(["PLAYER_ID", "OPP"])["PTS"].transform(
-    lambda x: x.shift(1).rolling(window=3, min_periods=1).mean()
-)
-
-# Add pace metric (poss/40)
-# Pace dictionaries
-pace_2025 = {
-    "ATL": 78.8, "CHI": 79.82, "CON": 78.87, "DAL": 80.21, "IND": 80.04,
-    "GSV": 78.63, "LVA": 79.98, "LAS": 80.8, "MIN": 78.64, "NYL": 81.65,
-    "PHO": 80.66, "SEA": 79.12, "WSH": 80.04
-}
-pace_2024 = {
-    "ATL": 78.96, "CHI": 79.76, "CON": 77.76, "DAL": 81.71, "IND": 81.28,
-    "LVA": 81.08, "LAS": 80.66, "MIN": 79.02, "NYL": 80.12,
-    "PHO": 79.9, "SEA": 81.09, "WSH": 80.41
-}
-# Apply opponent pace based on season year
-filtered["OPP_PACE"] = filtered.apply(
-    lambda row: pace_2024.get(row["OPP"]) if row["SEASON_YEAR"] == 2024
-    else pace_2025.get(row["OPP"]),
-    axis=1
-)
-
-# Drop unwanted columns
-if DROP_COLUMNS:
-    filtered.drop(columns=DROP_COLUMNS, inplace=True, errors='ignore')
-
-# Round to 5 decimal places
-float_cols = filtered.select_dtypes(include="number").columns
-filtered[float_cols] = filtered[float_cols].round(5)
-
-# Save the processed CSV
-print(f"Saving processed data to {OUTPUT_CSV}...")
-filtered.to_csv(OUTPUT_CSV, index=False)
-print("Done.")
\ No newline at end of file
+    with run_report("preprocess"):
+        if args.verify:
+            verify_append(load_game_logs(INPUT_DATASET, seasons=SEASONS, columns=INPUT_COLUMNS))
+        elif args.append:
+            state, pending = load_state(STATE_DIR)
+            with stage("load_logs") as s:
+                new_logs = load_game_logs(INPUT_DATASET, seasons=SEASONS, columns=INPUT_COLUMNS, since=state["through"])
+                s.rows = len(new_logs)
+            print(f"Appending rows since {state['through']:%Y-%m-%d} ({len(new_logs)} loaded)...")
+            with stage("update_features") as s:
+                features, pending, state = update_features(load_features(OUTPUT_STORE), pending, state, new_logs)
+                s.rows = len(features)
+            print(f"Saving processed data to {OUTPUT_STORE}...")
+            with stage("save_outputs", rows=len(features)):
+                save_outputs(features, pending, state)
+        else:
+            # Load only the seasons and columns we use
+            with stage("load_logs") as s:
+                df = load_game_logs(INPUT_DATASET, seasons=SEASONS, columns=INPUT_COLUMNS)
+                s.rows = len(df)
+            with stage("build_features") as s:
+                features, pending, state = build_features(df)
+                s.rows = len(features)
+            print(f"Saving processed data to {OUTPUT_STORE}...")
+            with stage("save_outputs", rows=len(features)):
+                save_outputs(features, pending, state)
+    print("Done.")
@@ -0,0 +1,96 @@
+"""
+Schedule-derived fatigue and travel features used by pre_processing.py.
+Every team-game gets its venue (the home team's arena), the great-circle km from the team's previous venue
+(DISTANCE_KM, computed once for every arena pair and indexed by TEAM_ABBREVIATION) and rolling time-window
+aggregates over the team's schedule. Windows come from one sorted int64 key per team-game
+(team code * KEY_STRIDE + day number) searched with np.searchsorted, and km totals from a cumulative sum,
+so any number of seasons is one sort plus linear array passes, with no per-team Python loop.
+"""
+import numpy as np
+import pandas as pd
+
+# arena (lat, lon) per TEAM_ABBREVIATION; games at an unknown venue get NaN travel_km (0 in the windows)
+ARENAS = {
+    "ATL": (33.6536, -84.4486),   # Gateway Center Arena, College Park
+    "CHI": (41.8537, -87.6216),   # Wintrust Arena
+    "CON": (41.4918, -72.0893),   # Mohegan Sun Arena, Uncasville
+    "DAL": (32.7310, -97.1102),   # College Park Center, Arlington
+    "GSV": (37.7680, -122.3877),  # Chase Center, San Francisco
+    "IND": (39.7640, -86.1555),   # Gainbridge Fieldhouse
+    "LAS": (34.0430, -118.2673),  # Crypto.com Arena, Los Angeles
+    "LVA": (36.0907, -115.1770),  # Michelob Ultra Arena, Las Vegas
+    "MIN": (44.9795, -93.2760),   # Target Center
+    "NYL": (40.6826, -73.9754),   # Barclays Center, Brooklyn
+    "PHO": (33.4457, -112.0712),  # Footprint Center
+    "SEA": (47.6221, -122.3540),  # Climate Pledge Arena
+    "WAS": (38.8443, -76.9886),   # Entertainment & Sports Arena
+    "WSH": (38.8443, -76.9886),   # (same arena, alternate abbreviation)
+}
+EARTH_KM = 6371.0
+KEY_STRIDE = 1 << 32  # team code * stride + day number keeps every team's days in its own sorted range
+
+
+def distance_matrix(arenas: dict = ARENAS) -> pd.DataFrame:
+    """Great-circle km between every pair of arenas, indexed by TEAM_ABBREVIATION on both axes."""
+    teams = list(arenas)
+    lat, lon = np.radians(np.array([arenas[t] for t in teams])).T
+    a = (np.sin((lat[:, None] - lat[None, :]) / 2) ** 2
+         + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin((lon[:, None] - lon[None, :]) / 2) ** 2)
+    return pd.DataFrame(2 * EARTH_KM * np.arcsin(np.sqrt(a)), index=teams, columns=teams)
+
+
+DISTANCE_KM = distance_matrix()
+
+
+def team_schedule(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per (GAME_ID, TEAM_ABBREVIATION) with GAME_DATE and VENUE (the home team's abbreviation),
+    from player rows carrying HOME_AWAY and OPP."""
+    games = df.groupby(["GAME_ID", "TEAM_ABBREVIATION"], as_index=False, observed=True).agg(
+        GAME_DATE=("GAME_DATE", "first"), HOME_AWAY=("HOME_AWAY", "first"), OPP=("OPP", "first"))
+    team = games["TEAM_ABBREVIATION"].astype(str).to_numpy()
+    games["TEAM_ABBREVIATION"] = team
+    games["VENUE"] = np.where(games["HOME_AWAY"].astype(str) == "Home", team, games["OPP"].astype(str))
+    return games[["GAME_ID", "TEAM_ABBREVIATION", "GAME_DATE", "VENUE"]]
+
+
+def fatigue_features(schedule: pd.DataFrame, windows, history: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Per team-game of `schedule`:
+    travel_km         km from the team's previous venue (0 for the first game on record),
+    back_to_back      1 if the team also played the day before,
+    games_last_{n}d   team games in the n days before tip-off (not counting this one),
+    km_last_{n}d      km over the trips that arrived in those n days, this game's trip included.
+    history holds earlier schedule rows (append mode); they feed the windows but are not returned."""
+    s = schedule.assign(_new=True)
+    if history is not None and len(history):
+        s = pd.concat([history.assign(_new=False), s], ignore_index=True)
+    s = s.sort_values(["TEAM_ABBREVIATION", "GAME_DATE"], kind="stable").reset_index(drop=True)
+
+    team = pd.factorize(s["TEAM_ABBREVIATION"])[0].astype(np.int64)  # ascending codes: s is sorted by team
+    day = s["GAME_DATE"].to_numpy().astype("datetime64[D]").astype(np.int64)
+    key = team * KEY_STRIDE + day
+    first = np.r_[True, team[1:] != team[:-1]]
+
+    venue = DISTANCE_KM.index.get_indexer(s["VENUE"])
+    prev_venue = np.r_[-1, venue[:-1]]
+    dist = DISTANCE_KM.to_numpy()
+    travel = np.where((venue >= 0) & (prev_venue >= 0), dist[prev_venue, venue], np.nan)
+    travel[first] = 0.0
+    km_total = np.r_[0.0, np.cumsum(np.nan_to_num(travel))]
+
+    out = s[["GAME_ID", "TEAM_ABBREVIATION"]].copy()
+    out["travel_km"] = travel
+    out["back_to_back"] = (~first & (day - np.r_[0, day[:-1]] == 1)).astype(np.int8)
+    pos = np.arange(len(s))
+    for n in windows:
+        start = np.searchsorted(key, key - n, side="left")  # first game on or after tip-off day - n
+        out[f"games_last_{n}d"] = (pos - start).astype(np.int16)
+        out[f"km_last_{n}d"] = km_total[pos + 1] - km_total[start]
+    return out[s["_new"].to_numpy()].reset_index(drop=True)
+
+
+def schedule_tail(schedule: pd.DataFrame, windows) -> pd.DataFrame:
+    """Rows append mode needs: each team's last max(windows) + 1 games (one game a day at most, plus the
+    previous venue and date for travel_km / back_to_back)."""
+    schedule = schedule.sort_values(["TEAM_ABBREVIATION", "GAME_DATE"], kind="stable")
+    keep = schedule.groupby("TEAM_ABBREVIATION", observed=True).cumcount(ascending=False) <= max(windows)
+    return schedule[keep].reset_index(drop=True)
@@ -1,15 +1,28 @@
 import os
-import time
-import random
-import requests
+from datetime import date, datetime, timedelta
 import pandas as pd
+from fetch_engine import FetchEngine
+from crawl_manifest import CrawlManifest
+from instrumentation import run_report, stage
+import game_log_dataset
 
 # get box scores for every game of every player for SEASONS
 SEASONS      = ["2024", "2025"]  # list of seasons for roster and logs
 LEAGUE_ID    = "10"                          # "10" for wnba
-THROTTLE_SEC = 1.1                           # seconds between requests (avoid 429 error)
-OUT_DIR      = "player_parquets"
-BASE_URL = "https://stats.wnba.com"
+MAX_WORKERS  = 4                             # requests kept in flight
+RATE_PER_SEC = 1.5                           # shared token-bucket rate (avoid 429 error)
+BURST        = 3                             # token-bucket capacity
+OUT_DIR      = "player_parquets"             # crawl manifest (and the opt-in per-player copies)
+DATASET_DIR  = game_log_dataset.DATASET_DIR  # partitioned season/team dataset streamed during the crawl
+WRITE_PLAYER_PARQUETS = False                # opt-in player_<pid>_logs_<season>.parquet copies, read back from the dataset
+WRITE_CSV    = False                         # opt-in CSV export of the whole dataset
+LIVE_SEASON  = SEASONS[-1]                   # only this season is refreshed once crawled
+INCREMENTAL  = True                          # skip crawled player-seasons, fetch only new live games
+REFRESH_HOURS = 6                            # live-season entries younger than this are skipped
+FETCH_MODE   = "bulk"                        # "bulk" (league-wide per date window) or "player"
+WINDOW_DAYS  = 31                            # date window per league-wide call in bulk mode
+SEASON_SPAN  = ((5, 1), (10, 31))            # (month, day) bounds of the WNBA regular season
+BASE_URL = os.environ.get("WNBA_STATS_BASE_URL", "https://stats.wnba.com")  # point at mock_stats_server.py for tests
 HEADERS = {
     "Accept":             "application/json, text/plain, */*",
     "Accept-Language":    "en-US,en;q=0.9",
@@ -55,13 +68,11 @@ def fetch_roster(session, season: str) -> list[str]:
                    (df["TO_YEAR"].astype(int) >= season_int)]
     return df_active["PERSON_ID"].astype(str).unique().tolist()
 
-# individual player data call given player id
-def one_player_call(session, player_id: str, season: str) -> pd.DataFrame:
-    """Acquire one player's game logs for a given season and return a df."""
-    url = BASE_URL + "/stats/playergamelogs"
-    params = {
-        "DateFrom":       "",
-        "DateTo":         "",
+def game_log_params(season: str, player_id: str = "", date_from: str = "", date_to: str = "") -> dict:
+    """Query params for /stats/playergamelogs; a blank PlayerID returns the whole league."""
+    return {
+        "DateFrom":       date_from,
+        "DateTo":         date_to,
         "GameSegment":    "",
         "LastNGames":     "0",
         "LeagueID":       LEAGUE_ID,
@@ -84,8 +95,10 @@ def one_player_call(session, player_id: str, season: str) -> pd.DataFrame:
         "VsConference":   "",
         "VsDivision":     ""
     }
-    session.headers["Referer"] = f"{BASE_URL}/player/{player_id}/boxscores-traditional/"
-    resp = session.get(url, params=params)
+
+# shared request + normalization for player and league-wide game logs
+def fetch_game_logs(session, params: dict, referer: str, label: str) -> pd.DataFrame:
+    resp = session.get(BASE_URL + "/stats/playergamelogs", params=params, headers={"Referer": referer}, label=label)
     resp.raise_for_status()
     data = resp.json()["resultSets"][0]
     df = pd.DataFrame(data["rowSet"], columns=data["headers"])
@@ -94,40 +107,183 @@ def one_player_call(session, player_id: str, season: str) -> pd.DataFrame:
     df_small = df[keep].copy()
     if "GAME_DATE" in df_small.columns:
         df_small["GAME_DATE"] = pd.to_datetime(df_small["GAME_DATE"])
-    df_small["SEASON_YEAR"] = season
+    df_small["SEASON_YEAR"] = params["Season"]
     return df_small
 
+# individual player data call given player id
+def one_player_call(session, player_id: str, season: str, date_from: str = "", date_to: str = "") -> pd.DataFrame:
+    """Acquire one player's game logs for a given season (optionally within MM/DD/YYYY bounds) and return a df."""
+    params = game_log_params(season, player_id, date_from, date_to)
+    return fetch_game_logs(session, params, f"{BASE_URL}/player/{player_id}/boxscores-traditional/", "one_player_call")
+
+# league-wide data call for one date window
+def league_call(session, season: str, date_from: str = "", date_to: str = "") -> pd.DataFrame:
+    """Acquire every player's game logs for a season (optionally within MM/DD/YYYY bounds) in one request."""
+    params = game_log_params(season, "", date_from, date_to)
+    return fetch_game_logs(session, params, f"{BASE_URL}/stats/players/boxscores-traditional/", "league_call")
+
+def season_windows(season: str, start: date | None = None) -> list[tuple[str, str]]:
+    """Split the season (up to today) into WINDOW_DAYS-long (DateFrom, DateTo) pairs on a fixed grid from
+    opening day, keeping those that end on or after start; a resumed crawl re-pulls the whole window holding
+    its watermark, which then replaces that window's files."""
+    year = int(season)
+    begin = date(year, *SEASON_SPAN[0])
+    end = min(date(year, *SEASON_SPAN[1]), date.today())
+    windows = []
+    while begin <= end:
+        stop = min(begin + timedelta(days=WINDOW_DAYS - 1), end)
+        if start is None or stop >= start:
+            windows.append((begin.strftime("%m/%d/%Y"), stop.strftime("%m/%d/%Y")))
+        begin = stop + timedelta(days=1)
+    return windows
+
+# player mode: merge newly fetched games into the player's rows in the dataset
+def store_player(manifest, pid: str, season: str, dfp: pd.DataFrame, append: bool) -> str:
+    stored = game_log_dataset.read_player(pid, season, DATASET_DIR) if append else None
+    if stored is not None:
+        dfp = pd.concat([stored, dfp], ignore_index=True)
+        dfp = dfp.drop_duplicates(subset=["GAME_ID"], keep="last")
+    game_log_dataset.write_player(dfp, pid, DATASET_DIR)
+    path = DATASET_DIR
+    if WRITE_PLAYER_PARQUETS:
+        path = os.path.join(OUT_DIR, f"player_{pid}_logs_{season}.parquet")
+        game_log_dataset.read_player(pid, season, DATASET_DIR).to_parquet(path, index=False)
+    if manifest:
+        last = dfp["GAME_DATE"].max() if not dfp.empty else None
+        manifest.record(pid, season, last, dfp.shape[0])
+    return path
+
+# bulk mode: one dataset write per window, then the window's players in the manifest (saved by the caller)
+def store_window(manifest, season: str, window: tuple[str, str], dfw: pd.DataFrame):
+    start = datetime.strptime(window[0], "%m/%d/%Y").strftime("%Y%m%d")
+    game_log_dataset.write_window(dfw, season, start, DATASET_DIR)
+    if manifest and not dfw.empty:
+        stored = game_log_dataset.load_game_logs(DATASET_DIR, seasons=[season], columns=["PLAYER_ID", "GAME_DATE"])
+        stored = stored[stored["PLAYER_ID"].isin(dfw["PLAYER_ID"].astype(int).unique())]
+        for pid, g in stored.groupby("PLAYER_ID"):
+            manifest.record(str(pid), season, g["GAME_DATE"].max(), len(g), save=False)
+
+# opt-in per-player copies of a bulk-crawled season, derived from the dataset once it is stored
+def export_player_parquets(season: str):
+    logs = game_log_dataset.load_game_logs(DATASET_DIR, seasons=[season])
+    for pid, dfp in logs.groupby("PLAYER_ID"):
+        dfp.to_parquet(os.path.join(OUT_DIR, f"player_{pid}_logs_{season}.parquet"), index=False)
+
+def crawl_season_players(engine, manifest, season: str) -> int:
+    """One request per rostered player; returns the number of failed players."""
+    print(f"Fetching season {season} roster…")
+    with stage("roster") as s:
+        roster = fetch_roster(engine, season)
+        s.rows = len(roster)
+    todo = [pid for pid in roster if manifest is None or manifest.needs_fetch(pid, season)]
+    print(f"→ {len(roster)} players found for {season}, {len(todo)} to fetch")
+
+    def fetch(pid):
+        date_from = manifest.date_from(pid, season) if manifest else ""
+        return one_player_call(engine, pid, season, date_from), date_from
+
+    errors = 0
+    for idx, (pid, result, err) in enumerate(engine.map(fetch, todo), start=1):
+        print(f"[{idx}/{len(todo)}] {season} | PlayerID={pid}", end="")
+        if err is not None:
+            errors += 1
+            print(f" ERROR: {err}")
+            continue
+        dfp, date_from = result
+        with stage("store_player", rows=dfp.shape[0]):
+            path = store_player(manifest, pid, season, dfp, append=bool(date_from))
+        print(f" → {dfp.shape[0]} new rows, saved to {path}")
+    return errors
+
+def crawl_season_bulk(engine, manifest, season: str) -> int:
+    """League-wide calls per date window, each window written to the dataset as soon as it arrives.
+    The manifest's bulk watermark advances through the windows stored so far, in date order, so a crash
+    only re-pulls from the first window that wasn't stored. Windows that still fail after retries fall
+    back to per-player calls. Returns the number of failed requests."""
+    through = manifest.bulk_through(season) if manifest else None
+    start = datetime.fromisoformat(through).date() if through else None
+    windows = season_windows(season, start)
+    if through is None:
+        game_log_dataset.remove_season(season, DATASET_DIR)  # a full pull replaces whatever the season held
+    print(f"Fetching season {season} league-wide in {len(windows)} window(s)…")
+
+    stored, failed, done, rows = set(), [], 0, 0
+    with stage("league_windows") as s:
+        for window, dfw, err in engine.map(lambda w: league_call(engine, season, *w), windows):
+            if err is not None:
+                print(f"  {window[0]}–{window[1]} ERROR: {err}")
+                failed.append(window)
+                continue
+            with stage("store_window", rows=dfw.shape[0]):
+                store_window(manifest, season, window, dfw)
+            print(f"  {window[0]}–{window[1]} → {dfw.shape[0]} rows")
+            rows += dfw.shape[0]
+            stored.add(window)
+            # windows complete out of order; the watermark only covers an unbroken run from the start
+            prefix = done
+            while done < len(windows) and windows[done] in stored:
+                done += 1
+            if manifest:  # the window's player entries and the watermark, in one manifest write
+                if done > prefix:
+                    manifest.set_bulk_through(season, windows[done - 1][1], save=False)
+                manifest.save()
+        s.rows = rows
+
+    errors = 0
+    if failed:
+        roster = fetch_roster(engine, season)
+        jobs = [(pid, w) for w in failed for pid in roster]
+        print(f"→ falling back to {len(jobs)} per-player calls for {len(failed)} window(s)")
+        by_window = {w: [] for w in failed}
+        with stage("player_fallback") as s:
+            for (_, window), dfp, err in engine.map(lambda job: one_player_call(engine, job[0], season, *job[1]), jobs):
+                if err is not None:
+                    errors += 1
+                elif not dfp.empty:
+                    by_window[window].append(dfp)
+            for window, frames in by_window.items():
+                if frames:
+                    dfw = pd.concat(frames, ignore_index=True)
+                    store_window(manifest, season, window, dfw)
+                    rows += dfw.shape[0]
+            s.rows = len(jobs)
+        if manifest:
+            if errors == 0:
+                manifest.set_bulk_through(season, windows[-1][1], save=False)
+            manifest.save()
+    if WRITE_PLAYER_PARQUETS:
+        with stage("player_parquets"):
+            export_player_parquets(season)
+    print(f"→ {rows} rows stored")
+    return errors
+
 # main
 if __name__ == "__main__":
-    os.makedirs(OUT_DIR, exist_ok=True)
-    session = requests.Session()
-    session.headers.update(HEADERS)
-    session.get(BASE_URL + "/")  # seed cookies / Cloudflare tokens
-
-    master_dfs = []
-    for season in SEASONS:
-        print(f"Fetching season {season} roster…")
-        roster = fetch_roster(session, season)
-        print(f"→ {len(roster)} players found for {season}")
-        for idx, pid in enumerate(roster, start=1):
-            print(f"[{idx}/{len(roster)}] {season} | PlayerID={pid}", end="")
-            try:
-                dfp = one_player_call(session, pid, season)
-                master_dfs.append(dfp)
-                path = os.path.join(OUT_DIR, f"player_{pid}_logs_{season}.parquet")
-                dfp.to_parquet(path, index=False)
-                print(f" → {dfp.shape[0]} rows, saved to {path}")
-            except Exception as e:
-                print(f" ERROR: {e}")
-            time.sleep(THROTTLE_SEC + random.random() * 0.3)
-
-    if not master_dfs:
-        print("No data.")
-        exit(1)
-
-    master_df = pd.concat(master_dfs, ignore_index=True)
-    out_parquet = f"wnba_all_players_{'_'.join(SEASONS)}.parquet"
-    out_csv     = f"wnba_all_players_{'_'.join(SEASONS)}.csv"
-    master_df.to_parquet(out_parquet, index=False)
-    master_df.to_csv(out_csv, index=False)
-    print(f"\nCombined rows: {master_df.shape[0]}. Saved {out_parquet} and {out_csv}.")
\ No newline at end of file
+    with run_report("crawl"):
+        os.makedirs(OUT_DIR, exist_ok=True)
+        manifest = CrawlManifest(OUT_DIR, LIVE_SEASON, REFRESH_HOURS) if INCREMENTAL else None
+        engine = FetchEngine(HEADERS, max_workers=MAX_WORKERS, rate=RATE_PER_SEC, burst=BURST)
+        engine.get(BASE_URL + "/")  # seed cookies / Cloudflare tokens
+
+        for season in SEASONS:
+            if manifest and manifest.season_complete(season):
+                print(f"Season {season} already crawled, skipping.")
+                continue
+            with stage(f"season_{season}"):
+                if FETCH_MODE == "bulk":
+                    errors = crawl_season_bulk(engine, manifest, season)
+                else:
+                    errors = crawl_season_players(engine, manifest, season)
+            if manifest:
+                manifest.mark_season(season, complete=(errors == 0))
+        engine.close()
+        print(f"{engine.requests} requests, {engine.retries} retries")
+
+        with stage("dataset") as s:
+            dataset = game_log_dataset.open_dataset(DATASET_DIR)
+            s.rows = dataset.count_rows()
+            print(f"\nDataset rows: {s.rows} in {DATASET_DIR}/.")
+            if WRITE_CSV:
+                out_csv = f"wnba_all_players_{'_'.join(SEASONS)}.csv"
+                rows = game_log_dataset.export_csv(out_csv, DATASET_DIR, SEASONS)
+                print(f"Exported {rows} rows to {out_csv}.")
@@ -0,0 +1,67 @@
+"""
+Usage-rate, shooting-efficiency and per-possession scoring features used by pre_processing.py.
+Every player-game is joined to its team's box totals (team_box_totals(): one groupby per GAME_ID and team)
+and split into the numerator / denominator of each rate. The features are the ratio of those parts summed
+over the player's previous `window` games (rolling-engine means, shifted so a game never sees itself), so
+heavy games weigh more, as in season rates, instead of averaging noisy per-game percentages.
+
+  usg_pct_prev_{n}      100 * (FGA + 0.44*FTA + TOV) * (team MIN / 5) / (MIN * team (FGA + 0.44*FTA + TOV))
+  ts_pct_prev_{n}       PTS / (2 * (FGA + 0.44*FTA))
+  pts_per_min_prev_{n}  PTS / MIN
+  pts_per_100_prev_{n}  100 * PTS / possessions on court (MIN * GAME_POSS / GAME_MIN)
+"""
+import numpy as np
+import pandas as pd
+
+FTA_WEIGHT = 0.44
+RATES = {  # feature stem -> (numerator part, denominator part, scale)
+    "usg_pct":     ("_usg_num", "_usg_den", 100.0),
+    "ts_pct":      ("_ts_pts", "_tsa", 0.5),
+    "pts_per_min": ("_min_pts", "_min", 1.0),
+    "pts_per_100": ("_poss_pts", "_poss", 100.0),
+}
+COMPONENTS = [c for num, den, _ in RATES.values() for c in (num, den)]
+
+
+def usage_specs(window: int) -> list:
+    """Rolling specs (pre_processing.ROLLING_SPECS format) for every component over `window` games."""
+    return [(f"{c}_prev", ("PLAYER_ID",), c, window) for c in COMPONENTS]
+
+
+def add_usage_components(df: pd.DataFrame, box: pd.DataFrame) -> pd.DataFrame:
+    """Attach each rate's per-game numerator and denominator; box is team_box_totals() of the same games.
+    A part is NaN whenever its partner is, so a window's sums always cover the same games."""
+    keys = pd.MultiIndex.from_arrays([box["GAME_ID"], box["TEAM_ABBREVIATION"]])
+    pos = keys.get_indexer(pd.MultiIndex.from_arrays([df["GAME_ID"], df["TEAM_ABBREVIATION"]]))
+    team = {c: np.where(pos >= 0, box[c].to_numpy(dtype=float)[pos], np.nan)
+            for c in ("MIN", "FGA", "FTA", "TOV", "GAME_POSS", "GAME_MIN")}
+
+    pts, mins = df["PTS"].to_numpy(dtype=float), df["MIN"].to_numpy(dtype=float)
+    fga, fta, tov = (df[c].to_numpy(dtype=float) for c in ("FGA", "FTA", "TOV"))
+    used = fga + FTA_WEIGHT * fta + tov
+    team_used = team["FGA"] + FTA_WEIGHT * team["FTA"] + team["TOV"]
+    parts = {
+        "_usg_num": used * team["MIN"] / 5,
+        "_usg_den": mins * team_used,
+        "_ts_pts": pts,
+        "_tsa": fga + FTA_WEIGHT * fta,
+        "_min_pts": pts,
+        "_min": mins,
+        "_poss_pts": pts,
+        "_poss": mins * team["GAME_POSS"] / team["GAME_MIN"],
+    }
+    for num, den, _ in RATES.values():
+        missing = np.isnan(parts[num]) | np.isnan(parts[den])
+        df[num] = np.where(missing, np.nan, parts[num])
+        df[den] = np.where(missing, np.nan, parts[den])
+    return df
+
+
+def add_usage_rates(df: pd.DataFrame, window: int) -> pd.DataFrame:
+    """Turn the rolled component means (usage_specs(window)) into the rate features; NaN for an empty
+    denominator (first game, or no shots / minutes in the window)."""
+    for stem, (num, den, scale) in RATES.items():
+        n, d = df[f"{num}_prev"].to_numpy(), df[f"{den}_prev"].to_numpy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            df[f"{stem}_prev_{window}"] = np.where(d > 0, scale * n / d, np.nan)
+    return df.drop(columns=[f"{c}_prev" for c in COMPONENTS])
@@ -1,39 +1,60 @@
-import pandas as pd
-from datetime import datetime
-
-# 🔧 EDIT HERE
-PLAYER_NAME = "A'ja Wilson"       # Full name as in PLAYER_NAME column
+"""
+Next-game model inputs for one or more players from the persisted player index (data_calls/player_index.py):
+each lookup reads only that player's contiguous, date-sorted games and the (player, opponent) slice, and
+the rolling averages go through the same ROLLING_SPECS engine that builds the training rows.
+
+Run: python gather_model_inputs.py "A'ja Wilson" 1628932 --opp ATL
+     python gather_model_inputs.py --players-file roster.txt --opp NYL --json
+"""
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_calls"))
+from player_index import INDEX_DIR, PlayerIndex, build_index
+
+# 🔧 EDIT HERE (defaults when no players are given on the command line)
+PLAYER_NAME = "A'ja Wilson"       # Full name as in PLAYER_NAME column, or a PLAYER_ID
 OPPONENT_ABBR = "ATL"             # Opponent abbreviation (e.g., "NYL")
 
-# 📄 Load and clean data
-df = pd.read_csv("processed_2024_2025.csv")
-df['game_date'] = pd.to_datetime(df['GAME_DATE'])  # Make sure dates are datetime
-
-# 🎯 Filter to games by this player, sorted by most recent
-player_df = df[df['PLAYER_NAME'] == PLAYER_NAME].sort_values('game_date', ascending=False)
-
-if player_df.empty:
-    print(f"No games found for player: {PLAYER_NAME}")
-    exit()
-
-# ⏳ Days since last game
-last_game_date = player_df.iloc[0]['game_date']
-days_since_last_game = (pd.Timestamp.today() - last_game_date).days
-
-# 📊 Compute averages
-avg_last_15 = player_df.head(15)['PTS'].mean()
-avg_last_5 = player_df.head(5)['PTS'].mean()
-
-# 🎯 Games vs specific opponent
-vs_opp_df = player_df[player_df['OPP'] == OPPONENT_ABBR].head(3)
-avg_last_3_vs_opp = vs_opp_df['PTS'].mean() if not vs_opp_df.empty else None
-
-# 🖨️ Display results
-print(f"\n📊 Stats for {PLAYER_NAME} vs {OPPONENT_ABBR}:")
-print(f"- Last 15 games avg: {avg_last_15:.2f} PTS")
-print(f"- Last 5 games avg:  {avg_last_5:.2f} PTS")
-if avg_last_3_vs_opp is not None:
-    print(f"- Last 3 games vs {OPPONENT_ABBR}: {avg_last_3_vs_opp:.2f} PTS")
-else:
-    print(f"- No recent games found vs {OPPONENT_ABBR}")
-print(f"- Days since last game: {days_since_last_game} days\n")
\ No newline at end of file
+SHOW_COLUMNS = ["PLAYER_NAME", "TEAM_ABBREVIATION", "last_game_date", "days_since_last_game", "games",
+                "avg_prev_5", "avg_prev_15", "games_vs_opp", "avg_prev_opp_3"]
+
+
+def read_players(path: str) -> list:
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Next-game rolling inputs for a list of players.")
+    parser.add_argument("players", nargs="*", help="PLAYER_NAME or PLAYER_ID values")
+    parser.add_argument("--opp", default=OPPONENT_ABBR, help="opponent abbreviation for the vs-opponent average")
+    parser.add_argument("--players-file", help="one player name or id per line")
+    parser.add_argument("--json", action="store_true", help="print records as JSON instead of a table")
+    parser.add_argument("--rebuild", action="store_true", help=f"rebuild {INDEX_DIR}/ even if it is current")
+    args = parser.parse_args()
+
+    players = args.players + (read_players(args.players_file) if args.players_file else [])
+    players = players or [PLAYER_NAME]
+
+    start = time.perf_counter()
+    if args.rebuild:
+        build_index()
+    index = PlayerIndex()
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    rows, missing = index.lookup(players, args.opp)
+    looked_up = time.perf_counter() - start
+
+    for player in missing:
+        print(f"No games found for player: {player}", file=sys.stderr)
+    if rows.empty:
+        sys.exit(1)
+    if args.json:
+        print(rows.assign(last_game_date=rows["last_game_date"].dt.strftime("%Y-%m-%d")).to_json(orient="records", indent=1))
+    else:
+        # 🖨️ Display results
+        print(f"\n📊 Next-game inputs vs {args.opp} ({len(rows)} players, index {loaded * 1000:.0f} ms, "
+              f"lookups {looked_up * 1000:.1f} ms):")
+        print(rows[SHOW_COLUMNS].to_string(index=False, float_format="{:.2f}".format))
@@ -0,0 +1,132 @@
+"""
+Walk-forward backtest over GAME_DATE: every RETRAIN_DAYS the model is retrained on the games before the
+cutoff (expanding history, or a sliding window) and scored on the games up to the next cutoff, so no
+future game ever reaches training: each fold is quantized from its own training rows, and test rows whose
+category never appears before the cutoff are encoded as missing, as a model saved at that cutoff would see them.
+
+With an expanding window only every REBASE_EVERY-th fold is a cold fit; the folds after it keep the first
+rounds - WARM_ROUNDS trees of that fit and boost WARM_ROUNDS new ones on their own history, so every fold has the
+same number of trees. The folds are split into chunks at those cold fits and the chunks run in parallel
+processes, so results don't depend on --jobs. A sliding window always refits cold, since a warm start would
+carry trees fit on games that have left the window.
+
+Run: python backtest.py --retrain-days 7 --jobs 4            (writes per-date RMSE/MAE to backtest_by_date.csv)
+     python backtest.py --window sliding --sliding-days 365        (cold refits only)
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_calls"))
+from feature_store import load_features
+from model_core import BEST_PARAMS, FEATURES, SEED, TARGET, model_frame
+from train_backend import TrainingSet, native_params
+
+# CONFIG
+RETRAIN_DAYS = 7              # cutoff spacing; each fold scores the games until the next cutoff
+MIN_TRAIN_DAYS = 60           # history required before the first cutoff
+WINDOW = "expanding"          # or "sliding"
+SLIDING_DAYS = 365            # training span for WINDOW = "sliding"
+WARM_ROUNDS = 50              # trees refit per warm-started fold (the rest come from the chunk's cold fit)
+REBASE_EVERY = 4              # folds per chunk: one cold fit, then warm starts from it
+OUT_CSV = "backtest_by_date.csv"
+
+_data, _nthread = None, 1  # per-process TrainingSet and thread budget, set by _init_worker
+
+
+def walk_forward_folds(dates: np.ndarray, retrain_days: int = RETRAIN_DAYS, min_train_days: int = MIN_TRAIN_DAYS,
+                       window: str = WINDOW, sliding_days: int = SLIDING_DAYS) -> list:
+    """(cutoff, train row positions, test row positions) per fold; dates must be sorted."""
+    dates = dates.astype("datetime64[D]")
+    cutoffs = np.arange(dates[0] + np.timedelta64(min_train_days, "D"), dates[-1] + np.timedelta64(1, "D"),
+                        np.timedelta64(retrain_days, "D"))
+    bounds = np.searchsorted(dates, np.append(cutoffs, dates[-1] + np.timedelta64(1, "D")))
+    starts = np.zeros(len(cutoffs), dtype=np.int64)
+    if window == "sliding":
+        starts = np.searchsorted(dates, cutoffs - np.timedelta64(sliding_days, "D"))
+    return [(pd.Timestamp(cutoffs[k]), np.arange(starts[k], bounds[k]), np.arange(bounds[k], bounds[k + 1]))
+            for k in range(len(cutoffs)) if bounds[k + 1] > bounds[k] > starts[k]]
+
+
+def _init_worker(df: pd.DataFrame, nthread: int):
+    global _data, _nthread
+    _data, _nthread = TrainingSet(df, FEATURES, TARGET, nthread=nthread), nthread
+
+
+def run_chunk(folds: list, warm: bool = True) -> list:
+    """Train and score one chunk: a cold fit on its first fold, then (warm) the rest from that fit's first
+    rounds - WARM_ROUNDS trees plus WARM_ROUNDS of their own, or (not warm) cold fits throughout."""
+    import xgboost as xgb
+    params, rounds = native_params(dict(BEST_PARAMS, random_state=SEED, nthread=_nthread))
+    base, out = None, []
+    for cutoff, train_idx, test_idx in folds:
+        start = time.perf_counter()
+        dtrain, dtest = _data.fold(train_idx, test_idx, cache=False)
+        if warm and base is not None and rounds > WARM_ROUNDS:
+            booster = xgb.train(params, dtrain, num_boost_round=WARM_ROUNDS, xgb_model=base[:rounds - WARM_ROUNDS])
+        else:
+            booster = base = xgb.train(params, dtrain, num_boost_round=rounds)
+        out.append({"cutoff": cutoff, "rows": test_idx, "pred": booster.predict(dtest),
+                    "train_rows": len(train_idx), "trees": booster.num_boosted_rounds(),
+                    "seconds": time.perf_counter() - start})
+    return out
+
+
+def backtest(df: pd.DataFrame, jobs: int = 1, warm: bool = True, **fold_args) -> tuple:
+    """Per-row predictions and per-fold stats for the whole walk-forward run."""
+    df = model_frame(df).sort_values("GAME_DATE", kind="stable").reset_index(drop=True)
+    folds = walk_forward_folds(df["GAME_DATE"].to_numpy(), **fold_args)
+    warm = warm and fold_args.get("window", WINDOW) == "expanding"
+    chunks = [folds[i:i + REBASE_EVERY] for i in range(0, len(folds), REBASE_EVERY)]
+    jobs = max(1, min(jobs, len(chunks)))
+    nthread = max(1, (os.cpu_count() or 1) // jobs)
+    if jobs == 1:
+        _init_worker(df, nthread)
+        parts = [run_chunk(chunk, warm) for chunk in chunks]
+    else:
+        with mp.Pool(jobs, initializer=_init_worker, initargs=(df, nthread)) as pool:
+            parts = pool.starmap(run_chunk, [(chunk, warm) for chunk in chunks], chunksize=1)
+    results = [r for part in parts for r in part]
+
+    preds = pd.Series(np.nan, index=df.index)
+    for r in results:
+        preds.iloc[r["rows"]] = r["pred"]
+    scored = df.loc[preds.notna(), ["GAME_DATE", "PLAYER_ID", TARGET]].assign(PRED=preds.dropna())
+    fold_stats = pd.DataFrame([{k: v for k, v in r.items() if k not in ("rows", "pred")} | {"test_rows": len(r["rows"])}
+                               for r in results])
+    return scored, fold_stats
+
+
+def by_date(scored: pd.DataFrame) -> pd.DataFrame:
+    err = scored["PRED"] - scored[TARGET]
+    g = scored.assign(SQ=err ** 2, ABS=err.abs()).groupby("GAME_DATE")
+    return pd.DataFrame({"rows": g.size(), "RMSE": np.sqrt(g["SQ"].mean()), "MAE": g["ABS"].mean()})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the points model over GAME_DATE.")
+    parser.add_argument("--retrain-days", type=int, default=RETRAIN_DAYS)
+    parser.add_argument("--min-train-days", type=int, default=MIN_TRAIN_DAYS)
+    parser.add_argument("--window", choices=["expanding", "sliding"], default=WINDOW)
+    parser.add_argument("--sliding-days", type=int, default=SLIDING_DAYS)
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes (chunks of REBASE_EVERY folds)")
+    parser.add_argument("--cold", action="store_true", help="retrain every fold from scratch (always with --window sliding)")
+    parser.add_argument("--out", default=OUT_CSV)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    warm = not args.cold and args.window == "expanding"
+    scored, folds = backtest(load_features(), args.jobs, warm, retrain_days=args.retrain_days,
+                             min_train_days=args.min_train_days, window=args.window,
+                             sliding_days=args.sliding_days)
+    daily = by_date(scored)
+    daily.to_csv(args.out)
+    err = scored["PRED"] - scored[TARGET]
+    print(f"{len(folds)} folds, {len(scored)} player-games scored in {time.perf_counter() - start:.1f}s "
+          f"(fold training {folds['seconds'].sum():.1f}s, {'warm-started' if warm else 'cold'}, {args.jobs} job(s))")
+    print(f"Walk-forward RMSE: {np.sqrt((err ** 2).mean()):.3f}  MAE: {err.abs().mean():.3f}")
+    print(f"Per-date curves written to {args.out}; last dates:")
+    print(daily.tail(5).round(3).to_string())
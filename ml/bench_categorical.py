@@ -0,0 +1,86 @@
+"""
+Benchmarks the native-categorical pipeline (float32 numerics + pandas categoricals, enable_categorical=True)
+against the previous OneHotEncoder/ColumnTransformer(remainder='passthrough') pipeline on the feature store:
+encoded input width and bytes, Python-side peak memory, fit and predict time, and holdout RMSE.
+--high-card also feeds OPP and TEAM_ABBREVIATION as categoricals, the roadmap's higher-cardinality inputs.
+
+Run: python bench_categorical.py --repeat 10 --high-card
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.metrics import root_mean_squared_error
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+from xgboost import XGBRegressor
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_calls"))
+from feature_store import load_features
+from frame_encoder import FrameEncoder
+from model_core import BEST_PARAMS, FEATURES, TARGET, category_features, split
+
+
+def legacy_pipeline(categorical):
+    preprocessor = ColumnTransformer(
+        transformers=[('onehot', OneHotEncoder(handle_unknown='ignore'), categorical)],
+        remainder='passthrough'
+    )
+    return Pipeline(steps=[('preprocessor', preprocessor), ('regressor', XGBRegressor(**BEST_PARAMS))])
+
+
+def native_pipeline(features, categorical):
+    return Pipeline(steps=[
+        ('preprocessor', FrameEncoder(features, categorical)),
+        ('regressor', XGBRegressor(enable_categorical=True, **BEST_PARAMS)),
+    ])
+
+
+def input_size(encoded) -> tuple:
+    if isinstance(encoded, pd.DataFrame):
+        return encoded.shape[1], int(encoded.memory_usage(index=False, deep=True).sum())
+    if hasattr(encoded, "indptr"):  # ColumnTransformer goes sparse when the one-hot block is wide
+        return encoded.shape[1], encoded.data.nbytes + encoded.indices.nbytes + encoded.indptr.nbytes
+    return encoded.shape[1], encoded.nbytes
+
+
+def measure(model, X_train, X_test, y_train, y_test) -> dict:
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+    start = time.perf_counter()
+    preds = model.predict(X_test)
+    predict_s = time.perf_counter() - start
+
+    # python-side peak while encoding the training rows and scoring the test rows (untimed pass)
+    tracemalloc.start()
+    model.named_steps['preprocessor'].transform(X_train)
+    model.predict(X_test)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    width, nbytes = input_size(model.named_steps['preprocessor'].transform(X_test))
+    return {"width": width, "input MB / 1k rows": 1000 * nbytes / len(X_test) / 2**20,
+            "py peak MB": peak / 2**20, "fit s": fit_s, "predict s": predict_s,
+            "RMSE": root_mean_squared_error(y_test, preds)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="one-hot ColumnTransformer vs native categorical pipeline")
+    parser.add_argument("--repeat", type=int, default=10, help="tile the feature store N times")
+    parser.add_argument("--high-card", action="store_true", help="add OPP and TEAM_ABBREVIATION as categoricals")
+    args = parser.parse_args()
+
+    features = FEATURES + (["OPP", "TEAM_ABBREVIATION"] if args.high_card else [])
+    categorical = category_features(FEATURES) + (["OPP", "TEAM_ABBREVIATION"] if args.high_card else [])
+    df = load_features(columns=features + [TARGET])
+    df = pd.concat([df] * args.repeat, ignore_index=True)
+    X_train, X_test, y_train, y_test = split(df, features)
+    print(f"{len(X_train):,} train / {len(X_test):,} test rows, categorical: {categorical}")
+
+    results = pd.DataFrame({
+        "one-hot ColumnTransformer": measure(legacy_pipeline(categorical), X_train, X_test, y_train, y_test),
+        "native categorical": measure(native_pipeline(features, categorical), X_train, X_test, y_train, y_test),
+    }).T
+    print(results.round(3).to_string())
@@ -1,69 +1,56 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.metrics import root_mean_squared_error
-from xgboost import XGBRegressor
+import argparse
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_calls"))
+from feature_store import load_features
+from instrumentation import run_report, stage
+from model_core import BEST_PARAMS, FEATURES, TARGET, example_input, make_pipeline, model_frame, split
+from model_registry import load_meta, load_model, save_model
 
-def preprocess_and_train(df):
-    # filter for required features
-    features = ['rest_diff', 'OPP_PACE', 'avg_prev_5', 
-                'avg_prev_15', 'HOME_AWAY', 'OPP_DEF_RATING', 'team_rest_days']
-    target = 'PTS'
-    df = df.dropna(subset=features + [target])
-    X = df[features]
-    y = df[target]
+MODEL_NAME = "points"        # registry name loaded by predict_service.py
+TUNED_NAME = "points_tuned"  # written by parameter_tuning.py
 
-    # train/test split
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+def preprocess_and_train(df, params=BEST_PARAMS):
+    from sklearn.metrics import root_mean_squared_error
 
-    # one-hot encode home/away
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('home_away_enc', OneHotEncoder(handle_unknown='ignore'), ['HOME_AWAY'])
-        ],
-        remainder='passthrough'
-    )
+    # train/test split over rows with every feature present
+    X_train, X_test, y_train, y_test = split(df)
 
-    # ml pipeline
-    model = Pipeline(steps=[
-        ('preprocessor', preprocessor),
-        ('regressor', XGBRegressor(
-            n_estimators = 530,
-            learning_rate = 0.01001361825891669,
-            max_depth = 3,
-            subsample = 0.7514892897979619,
-            colsample_bytree = 0.7348989896501112,
-            gamma = 1.99332691197874,
-            min_child_weight = 2,
-            reg_lambda = 2.865331577453844,
-            reg_alpha = 5.275622148785655,
-            ))
-    ])
-
-    model.fit(X_train, y_train)
+    # ml pipeline (float32 + native categorical frame -> xgboost)
+    model = make_pipeline(params)
+    with stage("fit", rows=len(X_train)):
+        model.fit(X_train, y_train)
 
     # model evaluation
-    preds = model.predict(X_test)
+    with stage("evaluate", rows=len(X_test)):
+        preds = model.predict(X_test)
     rmse = root_mean_squared_error(y_test, preds)
     print(f"Test RMSE: {rmse:.2f}")
-    return model
+    return model, {"test_rmse": float(rmse), "train_rows": len(X_train), "test_rows": len(X_test)}
 
 # main loop
 if __name__ == "__main__":
-    df = pd.read_csv('processed_2024_2025.csv')  # read data
-    model = preprocess_and_train(df)
-
-    # sample inputs
-    example_input = pd.DataFrame([{
-        'OPP_DEF_RATING': 99.4,
-        'avg_prev_15': 22.27,
-        'avg_prev_5': 24.2,
-        'HOME_AWAY': 'Away',
-        'rest_diff': 0,
-        'OPP_PACE': 80,
-        'team_rest_days': 5
-    }])
-    prediction = model.predict(example_input)
-    print(f"Predicted next game points: {prediction[0]:.2f}")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the points model and save it to the registry.")
+    parser.add_argument("--tuned", action="store_true",
+                        help=f"train with the params of the latest '{TUNED_NAME}' model instead of BEST_PARAMS")
+    args = parser.parse_args()
+
+    with run_report("train"):
+        with stage("load_features") as s:
+            df = load_features()  # read data
+            s.rows = len(df)
+        params = BEST_PARAMS
+        if args.tuned:
+            tuned = load_meta(TUNED_NAME)["params"]
+            params = {k: tuned[k] for k in BEST_PARAMS}
+        model, metrics = preprocess_and_train(df, params)
+        with stage("save_model"):
+            path = save_model(model, MODEL_NAME, FEATURES, TARGET, model_frame(df), metrics)
+        print(f"Saved model to {path}")
+        with stage("load_model"):
+            model = load_model(MODEL_NAME)  # what inference and analysis will see
+
+        # sample inputs
+        with stage("predict", rows=1):
+            prediction = model.predict(example_input())
+        print(f"Predicted next game points: {prediction[0]:.2f}")
@@ -1,58 +1,134 @@
-import pandas as pd
-from sklearn.model_selection import KFold, cross_val_score
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from xgboost import XGBRegressor
+"""
+K-fold cross validation of the points model with per-fold fit / predict timings.
+Folds run in parallel worker processes, each encoding the TrainingSet once, with the cores split between
+workers (nthread = cores // jobs, for quantizing as well as training) so XGBoost's threads and the process pool
+don't oversubscribe the machine. Each fold is quantized from its own training rows. With --early-stopping N, a seeded ES_FRACTION slice of each fold's training
+rows is held out to pick the number of trees; the fold's test rows are never seen before scoring.
+
+Run: python cross_validation.py --jobs 5
+     python cross_validation.py --jobs 5 --early-stopping 50 --rounds 2000 --set learning_rate=0.05
+"""
+import argparse
+import ast
+import multiprocessing as mp
+import os
+import sys
+import time
 import numpy as np
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_calls"))
+from feature_store import load_features
+from instrumentation import run_report, stage
+from model_core import BEST_PARAMS, FEATURES, SEED, TARGET, model_frame
+from train_backend import TrainingSet, es_split, native_params
+
+# CONFIG
+N_SPLITS = 5                  # KFold(N_SPLITS, shuffle=True, random_state=SEED)
+EARLY_STOPPING = None         # rounds without improvement on the held-out slice; None trains every round
+ES_FRACTION = 0.1             # share of each fold's training rows held out for early stopping
+
+_data = None  # per-process TrainingSet, set by _init_worker
+
+
+def _init_worker(df: pd.DataFrame, nthread: int):
+    global _data
+    _data = TrainingSet(df, FEATURES, TARGET, nthread=nthread)
+
+
+def run_fold(task: tuple) -> dict:
+    """Train one fold (optionally early-stopped on a slice of its training rows) and score its test rows."""
+    import xgboost as xgb
+    k, train_idx, test_idx, params, rounds, early_stopping, es_fraction = task
+    start = time.perf_counter()
+    if early_stopping:
+        fit_idx, es_idx = es_split(train_idx, es_fraction, SEED + k)
+        dtrain, des = _data.fold(fit_idx, es_idx, cache=False)
+        dtest = xgb.QuantileDMatrix(_data.valid_frame(fit_idx, test_idx), label=_data.y[test_idx], ref=dtrain,
+                                    nthread=_data.nthread, enable_categorical=True)
+    else:
+        fit_idx, es_idx = train_idx, train_idx[:0]
+        dtrain, dtest = _data.fold(train_idx, test_idx, cache=False)
+    prepared = time.perf_counter()
+
+    if early_stopping:
+        booster = xgb.train(params, dtrain, num_boost_round=rounds, evals=[(des, "es")],
+                            early_stopping_rounds=early_stopping, verbose_eval=False)
+        trees = booster.best_iteration + 1
+    else:
+        booster = xgb.train(params, dtrain, num_boost_round=rounds)
+        trees = rounds
+    fitted = time.perf_counter()
+    pred = booster.predict(dtest, iteration_range=(0, trees))
+    predicted = time.perf_counter()
+
+    return {"fold": k, "train_rows": len(fit_idx), "es_rows": len(es_idx), "test_rows": len(test_idx),
+            "trees": trees, "rmse": float(np.sqrt(np.mean((pred - _data.y[test_idx]) ** 2))),
+            "prepare_s": prepared - start, "fit_s": fitted - prepared, "predict_s": predicted - fitted}
+
+
+def cross_validate_folds(df: pd.DataFrame, params: dict = BEST_PARAMS, n_splits: int = N_SPLITS, jobs: int = 1,
+                         early_stopping=EARLY_STOPPING, es_fraction: float = ES_FRACTION) -> pd.DataFrame:
+    """One row per fold: rows, trees used, test RMSE and prepare / fit / predict seconds."""
+    from sklearn.model_selection import KFold
+    df = model_frame(df, FEATURES, TARGET).reset_index(drop=True)
+    jobs = max(1, min(jobs, n_splits))
+    nthread = max(1, (os.cpu_count() or 1) // jobs)
+    native, rounds = native_params(dict(params, random_state=SEED, nthread=nthread))
+    tasks = [(k, train_idx, test_idx, native, rounds, early_stopping, es_fraction)
+             for k, (train_idx, test_idx) in enumerate(KFold(n_splits, shuffle=True, random_state=SEED).split(df))]
+    if jobs == 1:
+        _init_worker(df, nthread)
+        results = list(map(run_fold, tasks))
+    else:
+        with mp.Pool(jobs, initializer=_init_worker, initargs=(df, nthread)) as pool:
+            results = pool.map(run_fold, tasks, chunksize=1)
+    return pd.DataFrame(results).set_index("fold").sort_index()
+
+
+def cross_validate_model(df, params: dict = BEST_PARAMS, jobs: int = 1, early_stopping=EARLY_STOPPING,
+                         es_fraction: float = ES_FRACTION) -> float:
+    start = time.perf_counter()
+    with stage("folds", rows=len(df)):
+        folds = cross_validate_folds(df, params, N_SPLITS, jobs, early_stopping, es_fraction)
+    wall = time.perf_counter() - start
+    print(folds.round(3).to_string())
+    busy = folds[["prepare_s", "fit_s", "predict_s"]].to_numpy().sum()
+    print(f"\n{len(folds)} folds in {wall:.2f}s wall ({busy:.2f}s of fold work, {jobs} job(s), "
+          f"{'early stopping ' + str(early_stopping) if early_stopping else 'no early stopping'})")
+    print(f"Cross-Validated RMSE scores: {folds['rmse'].to_numpy()}")
+    print(f"Mean RMSE: {folds['rmse'].mean():.3f}, Std Dev: {folds['rmse'].std(ddof=0):.3f}")
+    return folds["rmse"].mean()
+
+
+def parse_overrides(pairs) -> dict:
+    """--set name=value pairs as params; values are Python literals (4, 0.05, 'depthwise')."""
+    out = {}
+    for pair in pairs or []:
+        name, _, value = pair.partition("=")
+        try:
+            out[name] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            out[name] = value
+    return out
 
-def cross_validate_model(df):
-    # features / target
-    features = ['rest_diff', 'OPP_PACE', 'avg_prev_5', 
-                'avg_prev_15', 'HOME_AWAY', 'OPP_DEF_RATING', 'team_rest_days']
-    target = 'PTS'
-    df = df.dropna(subset=features + [target])
-    X = df[features]
-    y = df[target]
-
-    # preprocessing
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('home_away_enc', OneHotEncoder(handle_unknown='ignore'), ['HOME_AWAY'])
-        ],
-        remainder='passthrough'
-    )
-
-    # XGBRegressor pipeline
-    model = Pipeline(steps=[
-        ('preprocessor', preprocessor),
-        ('regressor', XGBRegressor(
-            n_estimators=530,
-            learning_rate=0.01001361825891669,
-            max_depth=3,
-            subsample=0.7514892897979619,
-            colsample_bytree=0.7348989896501112,
-            gamma=1.99332691197874,
-            min_child_weight=2,
-            reg_lambda=2.865331577453844,
-            reg_alpha=5.275622148785655,
-            random_state=42
-        ))
-    ])
-
-    # 5-fold cross validation
-    kf = KFold(n_splits=5, shuffle=True, random_state=42)
-    scores = cross_val_score(model, X, y, cv=kf, scoring='neg_root_mean_squared_error')
-
-    # convert negative scores to positive RMSE
-    rmse_scores = -scores
-    print(f"Cross-Validated RMSE scores: {rmse_scores}")
-    print(f"Mean RMSE: {rmse_scores.mean():.3f}, Std Dev: {rmse_scores.std():.3f}")
-
-    return rmse_scores.mean()
 
 # main loop
 if __name__ == "__main__":
-    df = pd.read_csv('processed_2024_2025.csv')  # Load data
-    avg_rmse = cross_validate_model(df)
-    print(f"Average RMSE across folds: {avg_rmse:.2f}")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="K-fold cross validation of the points model.")
+    parser.add_argument("--jobs", type=int, default=1, help="fold worker processes (cores are split between them)")
+    parser.add_argument("--early-stopping", type=int, default=EARLY_STOPPING, metavar="N",
+                        help="stop after N rounds without improvement on a held-out slice of each fold")
+    parser.add_argument("--es-fraction", type=float, default=ES_FRACTION)
+    parser.add_argument("--rounds", type=int, help="n_estimators (an upper bound with --early-stopping)")
+    parser.add_argument("--set", action="append", metavar="NAME=VALUE", help="override a BEST_PARAMS entry")
+    args = parser.parse_args()
+
+    params = dict(BEST_PARAMS, **parse_overrides(args.set))
+    if args.rounds:
+        params["n_estimators"] = args.rounds
+    with run_report("cv"):
+        with stage("load_features") as s:
+            df = load_features()  # Load data
+            s.rows = len(df)
+        avg_rmse = cross_validate_model(df, params, args.jobs, args.early_stopping, args.es_fraction)
+    print(f"Average RMSE across folds: {avg_rmse:.2f}")
@@ -1,85 +1,117 @@
-import pandas as pd
-from sklearn.model_selection import GridSearchCV, KFold
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from xgboost import XGBRegressor
-from sklearn.metrics import make_scorer
+import argparse
+import itertools
+import os
+import sys
+import time
 import numpy as np
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_calls"))
+from feature_store import load_features
+from model_core import FEATURES, SEED, TARGET, make_pipeline
+from train_backend import TrainingSet, native_params, train_fold
 
-# Custom RMSE scorer (compatible with all sklearn versions)
-def rmse(y_true, y_pred):
-    return np.sqrt(((y_true - y_pred) ** 2).mean())
+# successive halving: every combination starts with a small tree budget, the best 1/HALVING_FACTOR of each
+# round move on with HALVING_FACTOR x more trees, so the last of HALVING_ROUNDS rounds uses the grid's
+# largest n_estimators
+HALVING_FACTOR = 3
+HALVING_ROUNDS = 4
 
-rmse_scorer = make_scorer(rmse, greater_is_better=False)
+def grid_search(param_grid, folds):
+    # every combination of the other parameters is boosted once per fold to the largest n_estimators;
+    # smaller n_estimators are read off the per-iteration validation curve, which is the same model
+    tree_grid = param_grid.pop('n_estimators')
+    rows, fits, trees = [], 0, 0
+    for combo in itertools.product(*param_grid.values()):
+        params = dict(zip(param_grid, combo))
+        native, _ = native_params(dict(params, random_state=SEED))
+        curves = np.array([train_fold(native, max(tree_grid), fold)[1] for fold in folds])
+        fits, trees = fits + len(folds), trees + len(folds) * max(tree_grid)
+        for n in tree_grid:
+            rows.append({'mean_rmse': curves[:, n - 1].mean(), 'n_estimators': n, **params})
+    return pd.DataFrame(rows), fits, trees
 
-def tune_model(df):
-    # Features and target
-    features = ['rest_diff', 'OPP_PACE', 'avg_prev_5',
-                'avg_prev_15', 'HOME_AWAY', 'OPP_DEF_RATING', 'team_rest_days']
-    target = 'PTS'
-    df = df.dropna(subset=features + [target])
-    X = df[features]
-    y = df[target]
 
-    # Preprocessor: One-hot encode HOME_AWAY
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('home_away_enc', OneHotEncoder(handle_unknown='ignore'), ['HOME_AWAY'])
-        ],
-        remainder='passthrough'
-    )
+def halving_search(param_grid, folds):
+    # survivors keep their fold boosters and continue boosting from them in the next round
+    max_trees = max(param_grid.pop('n_estimators'))
+    budgets = [max_trees // HALVING_FACTOR ** (HALVING_ROUNDS - 1 - r) for r in range(HALVING_ROUNDS)]
+    candidates = [dict(zip(param_grid, combo)) for combo in itertools.product(*param_grid.values())]
+    boosters = {i: [None] * len(folds) for i in range(len(candidates))}
+    alive, done, rows, fits, trees = list(boosters), 0, [], 0, 0
+    for r, budget in enumerate(budgets):
+        scores = {}
+        for i in alive:
+            native, _ = native_params(dict(candidates[i], random_state=SEED))
+            last = []
+            for k, fold in enumerate(folds):
+                boosters[i][k], curve = train_fold(native, budget - done, fold, xgb_model=boosters[i][k])
+                last.append(curve[-1])
+            scores[i] = float(np.mean(last))
+            rows.append({'round': r, 'mean_rmse': scores[i], 'n_estimators': budget, **candidates[i]})
+        print(f"round {r}: {len(alive)} candidates x {len(folds)} folds at {budget} trees")
+        fits += len(alive) * len(folds)
+        trees += len(alive) * len(folds) * (budget - done)
+        done = budget
+        alive = sorted(alive, key=scores.get)[:max(1, len(alive) // HALVING_FACTOR)]
+        for i in set(scores) - set(alive):
+            boosters.pop(i)  # free the eliminated candidates' fold boosters
+    return pd.DataFrame(rows), fits, trees
 
-    # Pipeline: Preprocessor + XGBRegressor
-    pipeline = Pipeline(steps=[
-        ('preprocessor', preprocessor),
-        ('regressor', XGBRegressor(random_state=42))
-    ])
+
+def tune_model(df, search="halving"):
+    # Encode the registry features and quantize once; the 5 folds are reused by every combination
+    data = TrainingSet(df, FEATURES, TARGET)
+    folds = data.kfold(n_splits=5, seed=SEED)
 
     # Hyperparameter grid for tuning
     param_grid = {
-        'regressor__n_estimators': [200, 400, 600],
-        'regressor__learning_rate': [0.01, 0.05, 0.1],
-        'regressor__max_depth': [3, 4, 5],
-        'regressor__subsample': [0.7, 0.9, 1.0],
-        'regressor__colsample_bytree': [0.7, 0.9, 1.0]
+        'n_estimators': [200, 400, 600],
+        'learning_rate': [0.01, 0.05, 0.1],
+        'max_depth': [3, 4, 5],
+        'subsample': [0.7, 0.9, 1.0],
+        'colsample_bytree': [0.7, 0.9, 1.0]
     }
 
-    # Cross-validation strategy
-    cv = KFold(n_splits=5, shuffle=True, random_state=42)
-
-    # Grid Search with custom RMSE scorer
-    grid_search = GridSearchCV(
-        pipeline,
-        param_grid,
-        scoring=rmse_scorer,
-        cv=cv,
-        n_jobs=-1,
-        verbose=2
-    )
-
-    # Fit the model with grid search
-    grid_search.fit(X, y)
+    start = time.perf_counter()
+    if search == "halving":
+        results, fits, trees = halving_search(param_grid, folds)
+        # finalists first: scores from smaller tree budgets aren't comparable across rounds
+        results = results.sort_values(['round', 'mean_rmse'], ascending=[False, True])
+    else:
+        results, fits, trees = grid_search(param_grid, folds)
+        results = results.sort_values('mean_rmse')
+    elapsed = time.perf_counter() - start
+    best = results.to_dict('records')[0]
+    best_params = {k: best[k] for k in ['n_estimators', 'learning_rate', 'max_depth',
+                                        'subsample', 'colsample_bytree']}
 
     # Print best params and RMSE
     print("\n✅ Best Parameters:")
-    print(grid_search.best_params_)
+    print(best_params)
 
-    print(f"✅ Best Cross-Validated RMSE: {abs(grid_search.best_score_):.4f}\n")
+    print(f"✅ Best Cross-Validated RMSE: {best['mean_rmse']:.4f}\n")
 
     # Get top 5 parameter sets sorted by RMSE
-    results = pd.DataFrame(grid_search.cv_results_)
-    results['mean_rmse'] = abs(results['mean_test_score'])
-    top5 = results.sort_values('mean_rmse').head(5)[
-        ['mean_rmse', 'param_regressor__n_estimators', 'param_regressor__learning_rate',
-         'param_regressor__max_depth', 'param_regressor__subsample', 'param_regressor__colsample_bytree']
+    top5 = results.head(5)[
+        ['mean_rmse', 'n_estimators', 'learning_rate', 'max_depth', 'subsample', 'colsample_bytree']
     ]
     print("✅ Top 5 Parameter Combinations:")
-    print(top5)
+    print(top5.to_string(index=False))
+
+    # search cost: model fits and total boosting rounds trained
+    print(f"\n✅ {search} search: {fits} fits, {trees:,} trees trained, wall time {elapsed:.1f}s "
+          f"({data.builds} fold matrices built)")
 
-    return grid_search.best_estimator_
+    # Refit the best combination on all rows, as a Pipeline like the other training scripts return
+    model = make_pipeline(dict(best_params, random_state=SEED))
+    return model.fit(data.frame[FEATURES], data.frame[TARGET])
 
 # Main execution
 if __name__ == "__main__":
-    df = pd.read_csv('processed_2024_2025.csv')  # Load your data
-    best_model = tune_model(df)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search.")
+    parser.add_argument("--search", choices=["halving", "grid"], default="halving",
+                        help="successive halving over n_estimators, or the full 243-combination grid")
+    args = parser.parse_args()
+
+    df = load_features()  # Load your data
+    best_model = tune_model(df, args.search)
@@ -1,87 +1,154 @@
-import pandas as pd
+"""
+Feature analysis of a saved model, headless: nothing is retrained and nothing blocks on a plot window.
+For the registered model it computes
+  - gain importance from the booster,
+  - exact TreeSHAP contributions for every feature-store row in batches (XGBoost pred_contribs, multithreaded;
+    about half a millisecond per row per core for the tuned 530-tree model), their mean |SHAP| per feature,
+    and the per-row values (which sum to the prediction),
+  - permutation importance on the build_model.py holdout, the (feature, repeat) shuffles spread over
+    worker processes (for a segmented family: of its global model),
+and writes importance.csv, contributions.arrow and importance.png to OUT_DIR.
+
+Run: python feature_analysis.py --jobs 4 --repeats 5
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.metrics import root_mean_squared_error
-from xgboost import XGBRegressor
-
-def preprocess_and_train(df):
-    # filter for required features
-    features = ['rest_diff', 'OPP_PACE', 'avg_prev_5', 
-                'avg_prev_15', 'HOME_AWAY', 'OPP_DEF_RATING', 'team_rest_days']
-    target = 'PTS'
-    df = df.dropna(subset=features + [target])
-    X = df[features]
-    y = df[target]
-
-    # train/test split
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-    # one-hot encode home/away
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('home_away_enc', OneHotEncoder(handle_unknown='ignore'), ['HOME_AWAY'])
-        ],
-        remainder='passthrough'
-    )
-
-    # ml pipeline
-    model = Pipeline(steps=[
-        ('preprocessor', preprocessor),
-        ('regressor', XGBRegressor(n_estimators=100, learning_rate=0.1, random_state=42))
-    ])
-
-    model.fit(X_train, y_train)
-
-    # model evaluation
-    preds = model.predict(X_test)
-    rmse = root_mean_squared_error(y_test, preds)
-    print(f"Test RMSE: {rmse:.2f}")
-
-    # feature importance analysis
-    regressor = model.named_steps['regressor']
-
-    # get feature names after one-hot encoding
-    ohe = model.named_steps['preprocessor'].named_transformers_['home_away_enc']
-    encoded_features = list(ohe.get_feature_names_out(['HOME_AWAY']))
-    all_features = encoded_features + ['rest_diff', 'OPP_PACE', 'avg_prev_5', 'avg_prev_15', 'OPP_DEF_RATING', 'team_rest_days']
-
-    importances = regressor.feature_importances_
-    feature_importance_df = pd.DataFrame({
-        'Feature': all_features,
-        'Importance': importances
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_calls"))
+from feature_store import load_features
+from model_core import SEED, TARGET, example_input, model_frame, split
+from model_registry import RegisteredModel, load_model
+
+# CONFIG
+OUT_DIR = "feature_analysis"  # importance.csv, contributions.arrow, importance.png
+N_REPEATS = 5                 # shuffles per feature for permutation importance
+BATCH_ROWS = 200_000          # rows per pred_contribs call (bounds the dense contribution matrix)
+
+_model, _X, _y, _base = None, None, None, None  # per-process state, set by _init_worker
+
+
+def saved_model_importance(model):
+    # normalized average gain per encoded feature, same measure as XGBRegressor.feature_importances_
+    gain = model.booster.get_score(importance_type='gain')
+    importances = np.array([gain.get(name, gain.get(f"f{i}", 0.0))  # legacy one-hot models have f0.. names
+                            for i, name in enumerate(model.encoded_features)])
+    return pd.DataFrame({
+        'Feature': model.encoded_features,
+        'Importance': importances / importances.sum()
     }).sort_values(by='Importance', ascending=False)
 
-    print("\nTop Features by Importance:")
-    print(feature_importance_df)
 
-    # plot feature importance
-    plt.figure(figsize=(8, 6))
-    plt.barh(feature_importance_df['Feature'], feature_importance_df['Importance'])
-    plt.gca().invert_yaxis()
-    plt.title('XGBoost Feature Importance')
-    plt.xlabel('Importance')
-    plt.show()
+def shap_values(model, X: pd.DataFrame, batch_rows: int = BATCH_ROWS) -> pd.DataFrame:
+    """model.contributions() over X in row batches."""
+    return pd.concat([model.contributions(X.iloc[i:i + batch_rows]) for i in range(0, len(X), batch_rows)])
+
+
+def _rmse(X) -> float:
+    """Holdout RMSE of the worker's model on an already encoded frame."""
+    import xgboost as xgb
+    preds = _model.booster.predict(xgb.DMatrix(X, missing=np.nan, enable_categorical=True))
+    return float(np.sqrt(np.mean((preds - _y) ** 2)))
+
+
+def _init_worker(path: str, X_test: pd.DataFrame, y_test: np.ndarray, nthread: int):
+    global _model, _X, _y, _base
+    _model = RegisteredModel(path)
+    _model.booster.set_param({"nthread": nthread})
+    _X, _y = _model.transform(X_test), np.asarray(y_test, dtype=np.float32)  # encode once, shuffle encoded columns
+    _base = _rmse(_X)
+
+
+def _permuted_rmse(task: tuple) -> tuple:
+    j, seed = task
+    perm = np.random.default_rng(seed).permutation(len(_y))
+    if isinstance(_X, pd.DataFrame):
+        col = _X.columns[j]
+        X = _X.assign(**{col: pd.Series(_X[col].array.take(perm), index=_X.index)})  # keeps categorical dtype
+    else:  # legacy one-hot ndarray
+        X = _X.copy()
+        X[:, j] = X[perm, j]
+    return j, _rmse(X) - _base
+
+
+def permutation_importance(model, X_test, y_test, repeats: int = N_REPEATS, jobs: int = 1) -> pd.DataFrame:
+    """RMSE increase when each encoded feature is shuffled, mean and std over `repeats` shuffles."""
+    jobs = max(1, jobs)
+    nthread = max(1, (os.cpu_count() or 1) // jobs)
+    tasks = [(j, SEED + r) for j in range(len(model.encoded_features)) for r in range(repeats)]
+    if jobs == 1:
+        _init_worker(model.path, X_test, y_test, nthread)
+        results = list(map(_permuted_rmse, tasks))
+    else:
+        with mp.Pool(jobs, initializer=_init_worker, initargs=(model.path, X_test, y_test, nthread)) as pool:
+            results = pool.map(_permuted_rmse, tasks, chunksize=max(1, len(tasks) // (4 * jobs)))
+    drops = pd.DataFrame(results, columns=["j", "increase"]).groupby("j")["increase"]
+    return pd.DataFrame({"Feature": model.encoded_features,
+                         "perm_rmse_increase": drops.mean().to_numpy(), "perm_std": drops.std().to_numpy()})
+
+
+def plot_importance(importance: pd.DataFrame, path: str):
+    import matplotlib
+    matplotlib.use("Agg")  # file output only, never a window
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(1, 3, figsize=(15, 5), sharey=True)
+    for ax, col, title in zip(axes, ["gain", "mean_abs_shap", "perm_rmse_increase"],
+                              ["Gain (normalized)", "Mean |SHAP| (PTS)", "Permutation: RMSE increase"]):
+        ax.barh(importance["Feature"], importance[col],
+                xerr=importance["perm_std"] if col == "perm_rmse_increase" else None)
+        ax.set_title(title)
+    axes[0].invert_yaxis()
+    fig.suptitle('XGBoost Feature Importance')
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
 
-    return model, feature_importance_df
 
 # main loop
 if __name__ == "__main__":
-    df = pd.read_csv('processed_2024_2025.csv')  # read data
-    model, feature_importance_df = preprocess_and_train(df)
+    parser = argparse.ArgumentParser(description="Headless feature analysis of the saved points model.")
+    parser.add_argument("--model", default="points", help="registry name (written by build_model.py)")
+    parser.add_argument("--version", default="latest")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="permutation worker processes")
+    parser.add_argument("--repeats", type=int, default=N_REPEATS)
+    parser.add_argument("--out", default=OUT_DIR)
+    args = parser.parse_args()
+
+    model = load_model(args.model, args.version)
+    print(f"Loaded {model.path} (test RMSE {model.meta['metrics']['test_rmse']:.2f})")
+    df = model_frame(load_features(), model.input_columns, TARGET)
+    os.makedirs(args.out, exist_ok=True)
+
+    start = time.perf_counter()
+    shap = shap_values(model, df[model.input_columns])
+    shap_s = time.perf_counter() - start
+    preds = model.predict(df[model.input_columns])
+    drift = np.abs(shap.sum(axis=1).to_numpy() - preds).max()
+    contributions = pd.concat([df[["PLAYER_ID", "GAME_DATE"]], shap.add_prefix("SHAP_")], axis=1).assign(PRED=preds)
+    contributions.reset_index(drop=True).to_feather(os.path.join(args.out, "contributions.arrow"))
+    print(f"TreeSHAP for {len(df)} rows in {shap_s:.2f}s (max |sum - prediction| {drift:.1e})")
+
+    start = time.perf_counter()
+    _, X_test, _, y_test = split(df, model.features)  # build_model.py's holdout
+    perm = permutation_importance(model, X_test, y_test, args.repeats, args.jobs)
+    print(f"Permutation importance, {len(X_test)} rows x {len(perm)} features x {args.repeats} repeats "
+          f"on {args.jobs} job(s) in {time.perf_counter() - start:.2f}s")
+
+    importance = (saved_model_importance(model).rename(columns={"Importance": "gain"})
+                  .merge(shap.drop(columns="BIAS").abs().mean().rename("mean_abs_shap"),
+                         left_on="Feature", right_index=True)
+                  .merge(perm, on="Feature")
+                  .sort_values("mean_abs_shap", ascending=False))
+    importance.to_csv(os.path.join(args.out, "importance.csv"), index=False)
+    plot_importance(importance, os.path.join(args.out, "importance.png"))
+    print("\nTop Features by Importance:")
+    print(importance.round(4).to_string(index=False))
+    print(f"Wrote importance.csv, contributions.arrow and importance.png to {args.out}/")
 
     # sample inputs
-    example_input = pd.DataFrame([{
-        'OPP_DEF_RATING': 99.4,
-        'avg_prev_15': 22.27,
-        'avg_prev_5': 24.2,
-        'HOME_AWAY': 'Away',
-        'rest_diff': 0,
-        'OPP_PACE': 80,
-        'team_rest_days': 5
-    }])
-    prediction = model.predict(example_input)
-    print(f"Predicted next game points: {prediction[0]:.2f}")
\ No newline at end of file
+    prediction = model.predict(example_input())
+    print(f"Predicted next game points: {prediction[0]:.2f}")
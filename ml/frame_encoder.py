@@ -0,0 +1,30 @@
+"""
+Pipeline step that hands XGBoost a compact frame instead of a one-hot float64 matrix:
+numeric features become float32 columns, categorical ones pandas categoricals whose categories are fixed
+at fit time (read natively with enable_categorical=True, one column per feature whatever its cardinality).
+"""
+from sklearn.base import BaseEstimator, TransformerMixin
+from model_registry import encode
+
+
+class FrameEncoder(TransformerMixin, BaseEstimator):
+    """features default to X's columns at fit time; categorical lists the ones encoded as categories."""
+
+    def __init__(self, features=None, categorical=()):
+        self.features = features
+        self.categorical = categorical
+
+    def fit(self, X, y=None):
+        self.feature_names_in_ = list(X.columns if self.features is None else self.features)
+        self.categories_ = {c: sorted(X[c].dropna().astype(str).unique()) for c in self.categorical or ()}
+        return self
+
+    def spec(self) -> dict:
+        """Layout saved with the model so inference can rebuild the frame without sklearn."""
+        return {"columns": list(self.feature_names_in_), "categorical": self.categories_}
+
+    def transform(self, X):
+        return encode(X, self.spec())
+
+    def get_feature_names_out(self, input_features=None):
+        return list(self.feature_names_in_)
@@ -0,0 +1,82 @@
+"""
+Shared model definition used by every training, tuning and analysis entry point: the feature registry,
+target, tuned params, and factories for the preprocessor and the XGBoost pipeline.
+sklearn and xgboost are imported inside the factories, so importing this module (and any CLI that only
+parses arguments or loads saved artifacts) does not pay for them.
+"""
+
+# feature registry: name -> encoding. Adding a model input is one entry here
+# ("numeric" is fed as float32, "category" as a pandas categorical that XGBoost splits on natively;
+# categories are fixed at fit time and unseen values are treated as missing)
+FEATURE_REGISTRY = {
+    "rest_diff":      "numeric",
+    "OPP_PACE":       "numeric",
+    "avg_prev_5":     "numeric",
+    "avg_prev_15":    "numeric",
+    "HOME_AWAY":      "category",
+    "OPP_DEF_RATING": "numeric",
+    "team_rest_days": "numeric",
+}
+FEATURES = list(FEATURE_REGISTRY)
+TARGET = "PTS"
+SEED = 42
+
+# current best hyperparameters (parameter_tuning.py writes newer ones to the registry as points_tuned)
+BEST_PARAMS = {
+    "n_estimators": 530,
+    "learning_rate": 0.01001361825891669,
+    "max_depth": 3,
+    "subsample": 0.7514892897979619,
+    "colsample_bytree": 0.7348989896501112,
+    "gamma": 1.99332691197874,
+    "min_child_weight": 2,
+    "reg_lambda": 2.865331577453844,
+    "reg_alpha": 5.275622148785655,
+}
+
+
+def category_features(features=FEATURES) -> list:
+    return [f for f in features if FEATURE_REGISTRY.get(f) == "category"]
+
+
+def model_frame(df, features=FEATURES, target=TARGET):
+    """Rows with every feature and the target present."""
+    return df.dropna(subset=list(features) + [target])
+
+
+def split(df, features=FEATURES, target=TARGET, test_size=0.2, seed=SEED):
+    """Random (X_train, X_test, y_train, y_test) over model_frame(df)."""
+    from sklearn.model_selection import train_test_split
+    df = model_frame(df, features, target)
+    return train_test_split(df[list(features)], df[target], test_size=test_size, random_state=seed)
+
+
+def make_preprocessor(features=FEATURES):
+    """float32 numerics + fixed-category pandas categoricals, in registry order."""
+    from frame_encoder import FrameEncoder
+    return FrameEncoder(features, category_features(features))
+
+
+def make_pipeline(params=None, features=FEATURES, **overrides):
+    """Pipeline(preprocessor, XGBRegressor); params default to BEST_PARAMS, overrides are added on top."""
+    from sklearn.pipeline import Pipeline
+    from xgboost import XGBRegressor
+    params = dict(BEST_PARAMS if params is None else params, enable_categorical=True, **overrides)
+    return Pipeline(steps=[
+        ('preprocessor', make_preprocessor(features)),
+        ('regressor', XGBRegressor(**params))
+    ])
+
+
+def example_input():
+    """The sample row the scripts predict after training (features it doesn't set are NaN)."""
+    import pandas as pd
+    return pd.DataFrame([{
+        'OPP_DEF_RATING': 99.4,
+        'avg_prev_15': 22.27,
+        'avg_prev_5': 24.2,
+        'HOME_AWAY': 'Away',
+        'rest_diff': 0,
+        'OPP_PACE': 80,
+        'team_rest_days': 5
+    }]).reindex(columns=FEATURES)
@@ -0,0 +1,265 @@
+"""
+On-disk model registry: models/<name>/<version>/ holds the XGBoost booster in native UBJ format,
+a JSON spec of the input layout (categorical columns and their categories), and meta.json with the feature list, params,
+training-data fingerprint and metrics. Loading needs neither sklearn nor a training run.
+A segmented family (segmented_model.py) adds segments/<label>.ubj per segment and a "segments" entry in meta.json;
+booster.ubj is then the global model serving rows of segments too small to get their own.
+"""
+import hashlib
+import itertools
+import json
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+REGISTRY_DIR = "models"
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """Order-sensitive hash of the training frame's values and column names."""
+    h = hashlib.sha256(",".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+
+def preprocessor_spec(pipeline) -> dict:
+    """Input layout of a fitted pipeline: FrameEncoder.spec(), or the legacy one-hot ColumnTransformer's."""
+    ct = pipeline.named_steps["preprocessor"]
+    if hasattr(ct, "spec"):
+        return ct.spec()
+    names_in = list(ct.feature_names_in_)
+    onehot, passthrough = {}, []
+    for _, trans, cols in ct.transformers_:
+        if trans == "drop":
+            continue
+        cols = [names_in[c] if isinstance(c, (int, np.integer)) else c for c in cols]
+        if hasattr(trans, "categories_"):
+            for col, cats in zip(cols, trans.categories_):
+                onehot[col] = [str(c) for c in cats]
+        else:  # 'passthrough' (a one-to-one FunctionTransformer once fitted)
+            passthrough.extend(cols)
+    return {"onehot": onehot, "passthrough": passthrough}
+
+
+def _as_category(values: pd.Series, categories: list) -> pd.Categorical:
+    if isinstance(values.dtype, pd.CategoricalDtype):  # store columns: remap codes, no string round-trip
+        return pd.Categorical(values.cat.set_categories(categories))
+    return pd.Categorical(values.astype(str), categories=categories)
+
+
+def encode(X: pd.DataFrame, spec: dict):
+    """Model input for X: a float32/categorical frame (unseen categories -> missing), or for models saved
+    with the legacy one-hot spec, a float32 matrix laid out like the ColumnTransformer's output."""
+    if "columns" in spec:
+        cats = spec["categorical"]
+        return pd.DataFrame({
+            c: _as_category(X[c], cats[c]) if c in cats else X[c].to_numpy(dtype=np.float32)
+            for c in spec["columns"]
+        }, index=X.index)
+    blocks = []
+    for col, cats in spec["onehot"].items():
+        values = X[col].astype(str).to_numpy()
+        blocks.append(np.stack([values == c for c in cats], axis=1).astype(np.float32))
+    blocks.append(X[spec["passthrough"]].to_numpy(dtype=np.float32))
+    return np.hstack(blocks)
+
+
+def encoded_names(spec: dict) -> list:
+    if "columns" in spec:
+        return list(spec["columns"])
+    return [f"{col}_{cat}" for col, cats in spec["onehot"].items() for cat in cats] + list(spec["passthrough"])
+
+
+class RegisteredModel:
+    """Booster + preprocessing spec; predict() takes the same frame the sklearn pipeline took."""
+
+    def __init__(self, path: str):
+        import xgboost as xgb
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, "preprocessor.json")) as f:
+            self.spec = json.load(f)
+        self.booster = xgb.Booster()
+        self.booster.load_model(os.path.join(path, "booster.ubj"))
+        self.features = self.meta["features"]
+        self.feature_names_in_ = np.array(self.features, dtype=object)
+        self.encoded_features = encoded_names(self.spec)
+        self.input_columns = list(self.features)  # columns predict() reads
+
+    def transform(self, X: pd.DataFrame):
+        return encode(X, self.spec)
+
+    def dmatrix(self, X: pd.DataFrame):
+        import xgboost as xgb
+        return xgb.DMatrix(self.transform(X), missing=np.nan, enable_categorical=True)
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return self.booster.predict(self.dmatrix(X))
+
+    def contributions(self, X: pd.DataFrame) -> pd.DataFrame:
+        """Exact TreeSHAP values (XGBoost pred_contribs): one column per encoded feature plus BIAS,
+        each row summing to the row's prediction."""
+        contribs = self.booster.predict(self.dmatrix(X), pred_contribs=True)
+        return pd.DataFrame(contribs, columns=self.encoded_features + ["BIAS"], index=X.index)
+
+
+def assign_segments(values: pd.Series, segment: dict) -> np.ndarray:
+    """Segment label per row: pd.cut into segment["labels"] when the spec has bins, else the value itself.
+    Rows with a missing value get "" (no segment model, so the global one)."""
+    if segment.get("bins"):
+        edges = [-np.inf, *segment["bins"], np.inf]
+        labels = pd.cut(values.astype(float), edges, labels=segment["labels"], right=False)
+    else:
+        labels = pd.Series(values).astype("category")
+    return labels.astype(str).where(labels.notna(), "").to_numpy()
+
+
+class SegmentedModel(RegisteredModel):
+    """One booster per segment plus the global fallback; predict() encodes once and makes one batched
+    booster call per segment present in X."""
+
+    def __init__(self, path: str):
+        import xgboost as xgb
+        super().__init__(path)
+        self.segment = self.meta["segments"]
+        self.boosters = {}
+        for label in self.segment["models"]:
+            self.boosters[label] = xgb.Booster()
+            self.boosters[label].load_model(os.path.join(path, "segments", f"{label}.ubj"))
+        if self.segment["column"] not in self.input_columns:
+            self.input_columns.append(self.segment["column"])
+
+    def _by_segment(self, X: pd.DataFrame, score) -> list:
+        """[(row positions, score(booster, DMatrix of those rows))] for every segment present in X."""
+        import xgboost as xgb
+        encoded = self.transform(X)
+        codes, labels = pd.factorize(assign_segments(X[self.segment["column"]], self.segment))
+        out = []
+        for k, label in enumerate(labels):
+            rows = np.flatnonzero(codes == k)
+            dmat = xgb.DMatrix(encoded.iloc[rows], missing=np.nan, enable_categorical=True)
+            out.append((rows, score(self.boosters.get(label, self.booster), dmat)))
+        return out
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        preds = np.empty(len(X), dtype=np.float32)
+        for rows, p in self._by_segment(X, lambda b, d: b.predict(d)):
+            preds[rows] = p
+        return preds
+
+    def contributions(self, X: pd.DataFrame) -> pd.DataFrame:
+        contribs = np.empty((len(X), len(self.encoded_features) + 1), dtype=np.float32)
+        for rows, c in self._by_segment(X, lambda b, d: b.predict(d, pred_contribs=True)):
+            contribs[rows] = c
+        return pd.DataFrame(contribs, columns=self.encoded_features + ["BIAS"], index=X.index)
+
+
+def _write_version(name: str, spec: dict, boosters: dict, meta: dict, registry_dir: str) -> str:
+    """New models/<name>/<version>/ with boosters ({relative path: Booster or raw UBJ bytes}), the input
+    spec and meta.json; LATEST is replaced last (atomically), so readers never see a half-written version."""
+    now = datetime.now()
+    stamp = now.strftime("%Y%m%d-%H%M%S-%f")  # microseconds, so saves in the same second don't collide
+    for n in itertools.count():
+        version = stamp if n == 0 else f"{stamp}.{n}"  # another process got the same microsecond
+        path = os.path.join(registry_dir, name, version)
+        try:
+            os.makedirs(path)
+            break
+        except FileExistsError:
+            continue
+    for rel, booster in boosters.items():
+        os.makedirs(os.path.dirname(os.path.join(path, rel)), exist_ok=True)
+        if isinstance(booster, (bytes, bytearray)):
+            with open(os.path.join(path, rel), "wb") as f:
+                f.write(booster)
+        else:
+            booster.save_model(os.path.join(path, rel))
+    with open(os.path.join(path, "preprocessor.json"), "w") as f:
+        json.dump(spec, f, indent=1)
+    meta = {"name": name, "version": version, **meta, "created_at": now.isoformat(timespec="seconds")}
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=1, default=str)
+    tmp = os.path.join(registry_dir, name, f"LATEST.{version}.tmp")
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(registry_dir, name, "LATEST"))
+    return path
+
+
+def save_model(pipeline, name: str, features: list, target: str, train_df: pd.DataFrame,
+               metrics: dict, registry_dir: str = REGISTRY_DIR) -> str:
+    """Persist a fitted Pipeline(preprocessor, regressor); returns the new version directory."""
+    regressor = pipeline.named_steps["regressor"]
+    params = {k: v for k, v in regressor.get_params().items()
+              if v is not None and not callable(v) and not (isinstance(v, float) and np.isnan(v))}
+    meta = {
+        "features": list(features),
+        "target": target,
+        "params": params,
+        "data_fingerprint": data_fingerprint(train_df[list(features) + [target]]),
+        "rows": int(len(train_df)),
+        "metrics": metrics,
+    }
+    return _write_version(name, preprocessor_spec(pipeline), {"booster.ubj": regressor.get_booster()}, meta,
+                          registry_dir)
+
+
+def save_segmented(name: str, spec: dict, global_booster, segment_boosters: dict, segments: dict, features: list,
+                   target: str, train_df: pd.DataFrame, params: dict, metrics: dict,
+                   registry_dir: str = REGISTRY_DIR) -> str:
+    """Persist a segmented family: the global booster, one booster per segment label, and the segment spec
+    ({"column", "bins", "labels"} plus per-segment stats under "models")."""
+    boosters = {"booster.ubj": global_booster}
+    boosters.update({f"segments/{label}.ubj": b for label, b in segment_boosters.items()})
+    meta = {
+        "features": list(features),
+        "target": target,
+        "params": params,
+        "segments": segments,
+        "data_fingerprint": data_fingerprint(train_df[list(features) + [target]]),
+        "rows": int(len(train_df)),
+        "metrics": metrics,
+    }
+    return _write_version(name, spec, boosters, meta, registry_dir)
+
+
+def model_path(name: str, version: str = "latest", registry_dir: str = REGISTRY_DIR) -> str:
+    if version == "latest":
+        latest = os.path.join(registry_dir, name, "LATEST")
+        if not os.path.exists(latest):
+            raise FileNotFoundError(f"no saved model '{name}' in {registry_dir}/")
+        with open(latest) as f:
+            version = f.read().strip()
+    return os.path.join(registry_dir, name, version)
+
+
+def load_model(name: str, version: str = "latest", registry_dir: str = REGISTRY_DIR) -> RegisteredModel:
+    path = model_path(name, version, registry_dir)
+    with open(os.path.join(path, "meta.json")) as f:
+        segmented = "segments" in json.load(f)
+    return SegmentedModel(path) if segmented else RegisteredModel(path)
+
+
+def load_meta(name: str, version: str = "latest", registry_dir: str = REGISTRY_DIR) -> dict:
+    with open(os.path.join(model_path(name, version, registry_dir), "meta.json")) as f:
+        return json.load(f)
+
+
+def list_models(registry_dir: str = REGISTRY_DIR) -> pd.DataFrame:
+    """One row per saved version with its headline metrics."""
+    rows = []
+    for name in sorted(os.listdir(registry_dir)) if os.path.isdir(registry_dir) else []:
+        for version in sorted(os.listdir(os.path.join(registry_dir, name))):
+            meta_file = os.path.join(registry_dir, name, version, "meta.json")
+            if os.path.exists(meta_file):
+                with open(meta_file) as f:
+                    meta = json.load(f)
+                rows.append({"name": name, "version": version, "rows": meta["rows"],
+                             "data": meta["data_fingerprint"], **meta["metrics"]})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    print(list_models().to_string(index=False))
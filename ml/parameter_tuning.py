@@ -1,37 +1,69 @@
+"""
+Optuna search over the XGBoost hyperparameters.
+Trials run in parallel worker processes against a persistent journal (or SQLite) storage, so a study
+can be stopped and resumed. Each trial trains on the training split minus a seeded ES_FRACTION slice, early-stops
+on that slice and reports its per-iteration RMSE there to a median pruner, which abandons trials that are clearly
+behind. The test split is scored once, by the final model.
+
+Run: python parameter_tuning.py --trials 300 --jobs 4
+     python parameter_tuning.py --storage sqlite:///optuna_points.db --trials 100   # resume / extend
+"""
+import argparse
+import functools
+import multiprocessing as mp
+import os
+import sys
+import time
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.metrics import root_mean_squared_error
-from xgboost import XGBRegressor
-import optuna
-
-def preprocess_and_tune(df):
-    # Features and target
-    features = ['rest_diff', 'OPP_PACE', 'avg_prev_5', 
-                'avg_prev_15', 'HOME_AWAY', 'OPP_DEF_RATING', 'team_rest_days']
-    target = 'PTS'
-
-    # Drop rows with missing values in features or target
-    df = df.dropna(subset=features + [target])
-    X = df[features]
-    y = df[target]
-
-    # Train/test split (random for now, can do time-based if needed)
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-    # One-hot encode HOME_AWAY
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('home_away_enc', OneHotEncoder(handle_unknown='ignore'), ['HOME_AWAY'])
-        ],
-        remainder='passthrough'
-    )
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_calls"))
+from feature_store import load_features
+from model_core import FEATURES, SEED, TARGET, example_input, make_pipeline, model_frame, split
+from model_registry import save_model
+from train_backend import TrainingSet, native_params, train_fold
 
-    def objective(trial):
-        # Hyperparameter search space
-        params = {
+# CONFIG
+STUDY_NAME = "points_xgb"
+STORAGE = "optuna_points.journal"  # journal file path, or an RDB url such as sqlite:///optuna_points.db
+N_TRIALS = 300                     # total across all workers, including trials already in the study
+EARLY_STOPPING = 50                # rounds without eval-RMSE improvement before a trial stops
+ES_FRACTION = 0.1                  # share of the training split held out for early stopping, pruning and trial scores
+PRUNE_EVERY = 10                   # report eval RMSE to the pruner every N boosting rounds
+
+
+def get_storage(url: str = STORAGE):
+    if "://" in url:
+        return url  # optuna opens RDB urls itself
+    from optuna.storages.journal import JournalFileBackend, JournalStorage
+    return JournalStorage(JournalFileBackend(url))
+
+
+@functools.cache
+def pruning_callback_class():
+    """The PruningCallback class, built once per process on first use so importing this module
+    does not load xgboost."""
+    import xgboost as xgb
+
+    class PruningCallback(xgb.callback.TrainingCallback):
+        """Reports eval RMSE to the trial every `every` rounds and stops boosting once the pruner gives up on it."""
+
+        def __init__(self, trial, every: int = PRUNE_EVERY):
+            self.trial = trial
+            self.every = every
+            self.pruned = False
+
+        def after_iteration(self, model, epoch, evals_log):
+            if epoch % self.every:
+                return False
+            self.trial.report(evals_log["valid"]["rmse"][-1], epoch)
+            self.pruned = self.trial.should_prune()
+            return self.pruned
+
+    return PruningCallback
+
+
+def suggest(trial):
+    # Hyperparameter search space
+    return {
         "n_estimators": trial.suggest_int("n_estimators", 500, 2000),
         "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.2, log=True),
         "max_depth": trial.suggest_int("max_depth", 3, 8),
@@ -41,53 +73,97 @@ def preprocess_and_tune(df):
         "min_child_weight": trial.suggest_int("min_child_weight", 1, 10),
         "reg_lambda": trial.suggest_float("reg_lambda", 0.01, 10.0, log=True),
         "reg_alpha": trial.suggest_float("reg_alpha", 0.01, 10.0, log=True)
-        }
+    }
+
+
+def make_objective(fold, nthread: int):
+    import optuna
+
+    def objective(trial):
+        params = suggest(trial)
+        rounds = params.pop("n_estimators")
+        params, _ = native_params(dict(params, nthread=nthread, random_state=SEED))
+        pruning = pruning_callback_class()(trial)
+        booster, _ = train_fold(params, rounds, fold, early_stopping_rounds=EARLY_STOPPING, callbacks=[pruning])
+        if pruning.pruned:
+            raise optuna.TrialPruned()
+        trial.set_user_attr("best_iteration", booster.best_iteration + 1)
+        return booster.best_score
+    return objective
+
 
+def run_worker(df, storage_url: str, n_trials: int, nthread: int, seed: int):
+    """One tuning process: encodes and quantizes the (fit, early-stopping) split of the training rows once,
+    then pulls trials from the shared study."""
+    import optuna
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    fold = TrainingSet(df, nthread=nthread).holdout(test_size=0.2, seed=SEED, es_fraction=ES_FRACTION)
+    study = optuna.load_study(study_name=STUDY_NAME, storage=get_storage(storage_url),
+                              sampler=optuna.samplers.TPESampler(seed=seed))
+    study.optimize(make_objective(fold, nthread), n_trials=n_trials)
 
-        # Pipeline with XGBoost regressor
-        model = Pipeline(steps=[
-            ('preprocessor', preprocessor),
-            ('regressor', XGBRegressor(objective='reg:squarederror', eval_metric='rmse', **params))
-        ])
 
-        model.fit(X_train, y_train)
-        preds = model.predict(X_test)
-        rmse = root_mean_squared_error(y_test, preds)
-        return rmse
+def preprocess_and_tune(df, n_trials=N_TRIALS, jobs=1, storage_url=STORAGE):
+    import optuna
+    from sklearn.metrics import root_mean_squared_error
+    study = optuna.create_study(
+        study_name=STUDY_NAME, storage=get_storage(storage_url), direction="minimize", load_if_exists=True,
+        pruner=optuna.pruners.MedianPruner(n_startup_trials=10, n_warmup_steps=100, interval_steps=PRUNE_EVERY),
+    )
+    remaining = n_trials - len(study.trials)
+    print(f"Study '{STUDY_NAME}' has {len(study.trials)} trials; running {max(remaining, 0)} more on {jobs} worker(s)")
 
-    # Run Optuna
-    study = optuna.create_study(direction="minimize")
-    study.optimize(objective, n_trials=300)  # Increase n_trials for better results
+    # Run Optuna: trials split across worker processes sharing the storage, threads split across workers
+    start = time.perf_counter()
+    if remaining > 0:
+        nthread = max(1, (os.cpu_count() or 1) // jobs)
+        shares = [remaining // jobs + (i < remaining % jobs) for i in range(jobs)]
+        if jobs == 1:
+            run_worker(df, storage_url, remaining, nthread, SEED)
+        else:
+            workers = [mp.Process(target=run_worker, args=(df, storage_url, n, nthread, SEED + i))
+                       for i, n in enumerate(shares) if n]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+    study = optuna.load_study(study_name=STUDY_NAME, storage=get_storage(storage_url))
+    states = pd.Series([t.state.name for t in study.trials]).value_counts().to_dict()
+    print(f"Tuning wall time: {time.perf_counter() - start:.1f}s  trials: {states}")
 
+    if not any(t.state == optuna.trial.TrialState.COMPLETE for t in study.trials):
+        sys.exit(f"no completed trials in study '{STUDY_NAME}' ({states}); nothing to train, rerun with more --trials")
     print("Best hyperparameters:", study.best_trial.params)
 
-    # Train final model with best parameters
-    best_params = study.best_trial.params
-    final_model = Pipeline(steps=[
-        ('preprocessor', preprocessor),
-        ('regressor', XGBRegressor(objective='reg:squarederror', eval_metric='rmse', **best_params))
-    ])
+    # Train final model with best parameters, capped at the round count early-stopped on the training slice
+    X_train, X_test, y_train, y_test = split(df)
+    best_params = dict(study.best_trial.params,
+                       n_estimators=study.best_trial.user_attrs.get("best_iteration",
+                                                                    study.best_trial.params["n_estimators"]))
+    final_model = make_pipeline(best_params, objective='reg:squarederror', eval_metric='rmse')
     final_model.fit(X_train, y_train)
 
     preds = final_model.predict(X_test)
     rmse = root_mean_squared_error(y_test, preds)
     print(f"Final Test RMSE: {rmse:.2f}")
 
+    # tuned params and score go to the registry; build_model.py --tuned retrains with them
+    path = save_model(final_model, "points_tuned", FEATURES, TARGET, model_frame(df),
+                      {"test_rmse": float(rmse), "trials": len(study.trials)})
+    print(f"Saved tuned model to {path}")
+
     return final_model
 
 if __name__ == "__main__":
-    df = pd.read_csv('processed_2024_2025.csv')
-    model = preprocess_and_tune(df)
+    parser = argparse.ArgumentParser(description="Parallel, pruned Optuna tuning with persistent storage.")
+    parser.add_argument("--trials", type=int, default=N_TRIALS, help="total trials the study should reach")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes")
+    parser.add_argument("--storage", default=STORAGE, help="journal file or RDB url (sqlite:///...)")
+    args = parser.parse_args()
+
+    df = load_features()
+    model = preprocess_and_tune(df, args.trials, args.jobs, args.storage)
 
     # Example prediction
-    example_input = pd.DataFrame([{
-        'OPP_DEF_RATING': 99.4,
-        'avg_prev_15': 22.27,
-        'avg_prev_5': 24.2,
-        'HOME_AWAY': 'Away',
-        'rest_diff': 0,
-        'OPP_PACE': 80,
-        'team_rest_days': 5
-    }])
-    prediction = model.predict(example_input)
-    print(f"Predicted next game points: {prediction[0]:.2f}")
\ No newline at end of file
+    prediction = model.predict(example_input())
+    print(f"Predicted next game points: {prediction[0]:.2f}")
@@ -0,0 +1,144 @@
+"""
+Segmented model family: one points model per segment (scoring role tier, team, ...) plus the global model,
+trained concurrently. The feature frame is encoded once and written to an uncompressed Arrow file that
+every worker memory-maps read-only, so a worker only materializes its own segment's rows. Segments are
+scheduled largest first on a process pool with the cores split between workers (nthread = cores // jobs),
+so wall time follows the core count rather than the number of segments.
+
+The family is saved to the registry as points_<segment>; load_model() returns a SegmentedModel whose
+predict() routes rows by the segment column and makes one batched booster call per segment, so
+predict_service.py --model points_role serves a slate the same way. Segments with fewer than
+MIN_SEGMENT_ROWS training rows (and values unseen in training) are served by the global model.
+
+Run: python segmented_model.py --segment role --jobs 4
+     python segmented_model.py --segment team --min-rows 200
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_calls"))
+from feature_store import load_features, read_table
+from model_core import BEST_PARAMS, FEATURES, SEED, TARGET, category_features, model_frame
+from model_registry import assign_segments, encode, save_segmented
+from train_backend import native_params
+
+# CONFIG
+SEGMENTS = {                                  # name -> routing column, optional bins (left-closed) and labels
+    "role": {"column": "avg_prev_15", "bins": [8.0, 14.0], "labels": ["bench", "rotation", "scorer"]},
+    "team": {"column": "TEAM_ABBREVIATION"},
+    # "position": {"column": "POSITION"},     # needs a POSITION column joined onto the feature store
+}
+MIN_SEGMENT_ROWS = 300                        # training rows a segment needs to get its own booster
+GLOBAL = "*"                                  # task label of the global (fallback) model
+
+
+def write_matrix(df: pd.DataFrame, spec: dict, path: str):
+    """Encoded features + target as one uncompressed Arrow file for the workers to memory-map."""
+    import pyarrow.feather as feather
+    feather.write_feather(encode(df, spec).assign(**{TARGET: df[TARGET].to_numpy(dtype=np.float32)}),
+                          path, compression="uncompressed")
+
+
+def train_segment(task: tuple) -> dict:
+    """Fit one booster on rows `train_idx` of the shared matrix; score it on `test_idx`."""
+    import xgboost as xgb
+    label, matrix_path, train_idx, test_idx, params, rounds = task
+    start = time.perf_counter()
+    table = read_table(matrix_path)  # memory-mapped; take() only copies this segment's rows
+    train, test = table.take(train_idx).to_pandas(), table.take(test_idx).to_pandas()
+    dtrain = xgb.QuantileDMatrix(train.drop(columns=TARGET), label=train[TARGET], enable_categorical=True)
+    booster = xgb.train(params, dtrain, num_boost_round=rounds)
+    preds = booster.predict(xgb.DMatrix(test.drop(columns=TARGET), missing=np.nan, enable_categorical=True))
+    return {"label": label, "booster": booster.save_raw("ubj"), "test_idx": test_idx, "pred": preds,
+            "train_rows": len(train_idx), "seconds": time.perf_counter() - start}
+
+
+def train_family(df: pd.DataFrame, segment: dict, jobs: int = 1, min_rows: int = MIN_SEGMENT_ROWS,
+                 params: dict = BEST_PARAMS) -> tuple:
+    """Train the global model and every large-enough segment in parallel.
+    Returns (model frame, encoding spec, {label: booster bytes}, per-segment stats, holdout predictions)."""
+    from sklearn.model_selection import train_test_split
+    df = model_frame(df, FEATURES, TARGET).reset_index(drop=True)
+    spec = {"columns": list(FEATURES),
+            "categorical": {c: sorted(df[c].astype(str).unique()) for c in category_features(FEATURES)}}
+    labels = assign_segments(df[segment["column"]], segment)
+    train_idx, test_idx = train_test_split(np.arange(len(df)), test_size=0.2, random_state=SEED)  # split()'s rows
+    is_train = np.zeros(len(df), dtype=bool)
+    is_train[train_idx] = True
+
+    jobs = max(1, jobs)
+    params, rounds = native_params(dict(params, random_state=SEED, nthread=max(1, (os.cpu_count() or 1) // jobs)))
+    with tempfile.TemporaryDirectory() as tmp:
+        matrix_path = os.path.join(tmp, "matrix.arrow")
+        write_matrix(df, spec, matrix_path)
+        tasks = [(GLOBAL, matrix_path, np.sort(train_idx), np.sort(test_idx), params, rounds)]
+        for label in pd.unique(labels[labels != ""]):
+            rows = labels == label
+            if (rows & is_train).sum() >= min_rows:
+                tasks.append((label, matrix_path, np.flatnonzero(rows & is_train), np.flatnonzero(rows & ~is_train),
+                              params, rounds))
+        tasks.sort(key=lambda t: -len(t[2]))  # largest first keeps the pool busy to the end
+        if jobs == 1:
+            results = list(map(train_segment, tasks))
+        else:
+            with mp.Pool(min(jobs, len(tasks))) as pool:
+                results = list(pool.imap_unordered(train_segment, tasks))
+
+    by_label = {r["label"]: r for r in results}
+    boosters = {label: r["booster"] for label, r in by_label.items()}
+    # holdout: every test row is scored by its segment's booster, or by the global one
+    global_pred = pd.Series(by_label[GLOBAL]["pred"], index=by_label[GLOBAL]["test_idx"])
+    seg_pred = global_pred.copy()
+    for label, r in by_label.items():
+        if label != GLOBAL:
+            seg_pred.loc[r["test_idx"]] = r["pred"]
+    holdout = pd.DataFrame({"segment": labels[global_pred.index], "actual": df[TARGET].to_numpy()[global_pred.index],
+                            "global": global_pred.to_numpy(), "segmented": seg_pred.to_numpy()}, index=global_pred.index)
+    stats = pd.DataFrame([{"segment": r["label"], "train_rows": r["train_rows"], "seconds": r["seconds"]}
+                          for r in results]).set_index("segment")
+    return df, spec, boosters, stats, holdout
+
+
+def holdout_report(holdout: pd.DataFrame, stats: pd.DataFrame) -> pd.DataFrame:
+    """Per segment: test rows and RMSE of the global vs the segmented family on the same rows."""
+    sq = holdout.assign(g=(holdout["global"] - holdout["actual"]) ** 2, s=(holdout["segmented"] - holdout["actual"]) ** 2)
+    by = sq.groupby("segment")
+    out = pd.DataFrame({"test_rows": by.size(), "global_rmse": np.sqrt(by["g"].mean()),
+                        "segmented_rmse": np.sqrt(by["s"].mean())})
+    out["own_model"] = out.index.isin(stats.index)
+    return out.join(stats.drop(index=GLOBAL))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a segmented points model family in parallel.")
+    parser.add_argument("--segment", choices=list(SEGMENTS), default="role")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--min-rows", type=int, default=MIN_SEGMENT_ROWS)
+    args = parser.parse_args()
+
+    segment = SEGMENTS[args.segment]
+    start = time.perf_counter()
+    df, spec, boosters, stats, holdout = train_family(load_features(), segment, args.jobs, args.min_rows)
+    wall = time.perf_counter() - start
+
+    report = holdout_report(holdout, stats)
+    rmse = lambda col: float(np.sqrt(((holdout[col] - holdout["actual"]) ** 2).mean()))
+    print(report.round(3).to_string())
+    print(f"\n{len(boosters) - 1} segment models + global trained in {wall:.1f}s wall "
+          f"({stats['seconds'].sum():.1f}s of fits, {args.jobs} job(s))")
+    print(f"Holdout RMSE: global {rmse('global'):.3f}, segmented {rmse('segmented'):.3f}")
+
+    models = {label: {"train_rows": int(stats.loc[label, "train_rows"]),
+                      "test_rmse": float(report.loc[label, "segmented_rmse"])}
+              for label in boosters if label != GLOBAL}
+    path = save_segmented(f"points_{args.segment}", spec, boosters.pop(GLOBAL), boosters,
+                          dict(segment, name=args.segment, models=models), FEATURES, TARGET, df,
+                          dict(BEST_PARAMS, random_state=SEED),
+                          {"test_rmse": rmse("segmented"), "global_test_rmse": rmse("global"),
+                           "train_rows": int(stats.loc[GLOBAL, "train_rows"]), "test_rows": len(holdout)})
+    print(f"Saved model to {path}")
@@ -0,0 +1,107 @@
+"""
+Native XGBoost training backend: TrainingSet and native_params are shared by cross_validation.py,
+cv_parameter_tuning.py, parameter_tuning.py and backtest.py, train_fold by the two tuning scripts.
+The feature frame is encoded once (float32 numerics, fixed-category categoricals); each fold's training rows are
+quantized with cut points of their own, its valid rows against those (ref=dtrain), so no fold sees the distribution of
+rows it is scored on. Fold matrices are cached, so every trial reuses the same prepared data with xgb.train.
+"""
+import numpy as np
+import pandas as pd
+from model_core import FEATURES, SEED, TARGET, category_features, model_frame
+from model_registry import encode, encoded_names
+
+MAX_BIN = 256  # xgboost's default histogram resolution
+
+
+def native_params(params: dict) -> tuple:
+    """Split sklearn-style XGBRegressor params into (xgb.train params, num_boost_round)."""
+    params = dict(params)
+    rounds = params.pop("n_estimators", 100)
+    if "random_state" in params:
+        params["seed"] = params.pop("random_state")
+    params.setdefault("objective", "reg:squarederror")
+    params.setdefault("eval_metric", "rmse")
+    params.setdefault("tree_method", "hist")
+    return params, rounds
+
+
+class TrainingSet:
+    """Encoded feature frame with cached per-fold QuantileDMatrix views."""
+
+    def __init__(self, df, features: list = FEATURES, target: str = TARGET, max_bin: int = MAX_BIN,
+                 nthread: int | None = None):
+        df = model_frame(df, features, target)
+        self.spec = {"columns": list(features),
+                     "categorical": {c: sorted(df[c].astype(str).unique()) for c in category_features(features)}}
+        self.frame = df
+        self.features = features
+        self.encoded_features = encoded_names(self.spec)
+        self.X = encode(df, self.spec)
+        self.y = df[target].to_numpy(dtype=np.float32)
+        self.max_bin = max_bin
+        self.nthread = nthread  # threads for quantizing fold matrices (None: all cores); set it in pool workers
+        self._folds = {}
+        self.builds = 0  # fold matrices actually constructed (the rest were cache hits)
+
+    def __len__(self):
+        return len(self.y)
+
+    def fold(self, train_idx: np.ndarray, valid_idx: np.ndarray, cache: bool = True) -> tuple:
+        """(dtrain, dvalid) for these row positions, quantized with cut points from the training rows only.
+        cache=False for one-off folds (e.g. walk-forward steps) that would only grow the cache."""
+        import xgboost as xgb
+        key = (len(train_idx), hash(train_idx.tobytes()), len(valid_idx), hash(valid_idx.tobytes()))
+        if key in self._folds:
+            return self._folds[key]
+        dtrain = xgb.QuantileDMatrix(self.X.iloc[train_idx], label=self.y[train_idx], max_bin=self.max_bin,
+                                     nthread=self.nthread, enable_categorical=True)
+        dvalid = xgb.QuantileDMatrix(self.valid_frame(train_idx, valid_idx), label=self.y[valid_idx], ref=dtrain,
+                                     nthread=self.nthread, enable_categorical=True)
+        self.builds += 1
+        if cache:
+            self._folds[key] = (dtrain, dvalid)
+        return dtrain, dvalid
+
+    def valid_frame(self, train_idx: np.ndarray, valid_idx: np.ndarray) -> pd.DataFrame:
+        """X at valid_idx with categories absent from the training rows set to missing, as encode() does
+        for a saved model meeting a category it was never trained on."""
+        X = self.X.iloc[valid_idx]
+        for c in self.spec["categorical"]:
+            codes = self.X[c].cat.codes.to_numpy()
+            unseen = ~np.isin(codes[valid_idx], np.unique(codes[train_idx]))
+            if unseen.any():
+                X = X.assign(**{c: X[c].mask(unseen)})
+        return X
+
+    def kfold(self, n_splits: int = 5, seed: int = SEED) -> list:
+        """Same folds as KFold(n_splits, shuffle=True, random_state=seed) over the frame."""
+        from sklearn.model_selection import KFold
+        return [self.fold(tr, va) for tr, va in KFold(n_splits, shuffle=True, random_state=seed).split(self.X)]
+
+    def holdout(self, test_size: float = 0.2, seed: int = SEED, es_fraction: float | None = None) -> tuple:
+        """Same rows as train_test_split(X, y, test_size=test_size, random_state=seed). With es_fraction,
+        (fit, early-stopping) matrices over es_split() of the training rows instead; the test rows stay unseen."""
+        from sklearn.model_selection import train_test_split
+        tr, va = train_test_split(np.arange(len(self)), test_size=test_size, random_state=seed)
+        if es_fraction:
+            tr, va = es_split(tr, es_fraction, seed)
+        return self.fold(tr, va)
+
+
+def es_split(train_idx: np.ndarray, fraction: float, seed: int = SEED) -> tuple:
+    """(fit rows, early-stopping rows): a seeded `fraction` of train_idx held out to pick the number of trees."""
+    shuffled = np.random.default_rng(seed).permutation(train_idx)
+    n_es = max(1, int(len(shuffled) * fraction))
+    return np.sort(shuffled[n_es:]), np.sort(shuffled[:n_es])
+
+
+def train_fold(params: dict, rounds: int, fold: tuple, early_stopping_rounds=None, callbacks=None,
+               xgb_model=None) -> tuple:
+    """Train on one fold; returns (booster, per-iteration valid RMSE)."""
+    import xgboost as xgb
+    dtrain, dvalid = fold
+    history = {}
+    booster = xgb.train(params, dtrain, num_boost_round=rounds, evals=[(dvalid, "valid")],
+                        evals_result=history, early_stopping_rounds=early_stopping_rounds,
+                        callbacks=callbacks, xgb_model=xgb_model, verbose_eval=False)
+    return booster, np.asarray(history["valid"]["rmse"])
@@ -0,0 +1,273 @@
+"""
+Low-latency points projections from a persisted model.
+Loads the registered model (native booster + input spec) once, then indexes every player's latest state
+from the feature store (last games' points, team, last game date) and every team's season-to-date context,
+so a query only assembles feature rows and calls predict. A slate (a night's games) projects every rostered
+player on both sides in one vectorized pass and one predict call. explain=True adds exact per-feature
+TreeSHAP contributions (SHAP_<feature>, summing with SHAP_BIAS to PRED_PTS) from the same booster.
+
+Python:  svc = PredictionService(); svc.predict([("A'ja Wilson", "ATL", "2025-08-01", "Away")])
+         svc.slate([("LVA", "ATL", "2025-08-01"), ("CHI", "NYL", "2025-08-01")])   # (away, home, date)
+CLI:     python predict_service.py "A'ja Wilson" ATL 2025-08-01 --home-away Away
+         python predict_service.py --slate LVA@ATL,CHI@NYL --date 2025-08-01   (or --slate-file games.csv; --explain)
+HTTP:    python predict_service.py --serve --port 8000
+         GET  /predict?player=A'ja Wilson&opp=ATL&date=2025-08-01&home_away=Away
+         POST /predict  [{"player": ..., "opp": ..., "date": ..., "home_away": ...}, ...]
+         GET  /slate?games=LVA@ATL,CHI@NYL&date=2025-08-01&explain=1
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+import pyarrow.feather as feather
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_calls"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml"))
+from feature_store import FEATURE_STORE, load_features
+from instrumentation import run_report, stage
+from model_registry import REGISTRY_DIR, load_model
+from pre_processing import DEFAULT_DAYS, ROLLING_SPECS, STATE_DIR
+
+MODEL_NAME = "points"  # written by ml/build_model.py
+
+
+class PredictionService:
+    def __init__(self, model_name: str = MODEL_NAME, store_path: str = FEATURE_STORE,
+                 state_dir: str = STATE_DIR, version: str = "latest", registry_dir: str = REGISTRY_DIR):
+        self.model = load_model(model_name, version, registry_dir)
+        self.features = self.model.features
+        history = load_features(store_path).sort_values(["PLAYER_ID", "GAME_DATE"], kind="stable")
+        team_games = feather.read_feather(os.path.join(state_dir, "team_games.arrow"))
+        self._index_players(history)
+        self._index_teams(team_games)
+
+    def _index_players(self, history: pd.DataFrame):
+        """Latest team/date per player and each rolling spec's value for the player's next game."""
+        history = history.assign(OPP=history["OPP"].astype(str),
+                                 PLAYER_NAME=history["PLAYER_NAME"].astype(str))
+        last = history.groupby("PLAYER_ID").tail(1).set_index("PLAYER_ID")
+        self.players = last[["PLAYER_NAME", "TEAM_ABBREVIATION", "SEASON_YEAR", "GAME_DATE"]].copy()
+        self.players["TEAM_ABBREVIATION"] = self.players["TEAM_ABBREVIATION"].astype(str)
+        # a team's roster: players whose latest game was for it in the team's latest season
+        latest = self.players["SEASON_YEAR"] == self.players.groupby("TEAM_ABBREVIATION")["SEASON_YEAR"].transform("max")
+        self.rosters = self.players.loc[latest, ["TEAM_ABBREVIATION"]].reset_index()
+        self.by_opp = {}
+        for name, keys, column, window, *_ in ROLLING_SPECS:
+            recent = history.groupby(list(keys), observed=True).cumcount(ascending=False) < window
+            means = history[recent].groupby(list(keys), observed=True)[column].mean()
+            if tuple(keys) == ("PLAYER_ID",):
+                self.players[name] = means
+            else:
+                self.by_opp[name] = means  # indexed by (PLAYER_ID, OPP)
+        self.name_to_id = pd.Series(self.players.index, index=self.players["PLAYER_NAME"])
+        self.name_to_id = self.name_to_id[~self.name_to_id.index.duplicated(keep="last")]
+
+    def _index_teams(self, team_games: pd.DataFrame):
+        """Each team's last game date and current-season DEF_RATING / PACE."""
+        team_games = team_games.dropna(subset=["GAME_POSS"])
+        team_games = team_games.assign(TEAM_ABBREVIATION=team_games["TEAM_ABBREVIATION"].astype(str))
+        latest = team_games["SEASON_YEAR"] == team_games.groupby("TEAM_ABBREVIATION")["SEASON_YEAR"].transform("max")
+        totals = team_games[latest].groupby("TEAM_ABBREVIATION")[["GAME_POSS", "PTS_ALLOWED", "GAME_MIN"]].sum()
+        self.teams = pd.DataFrame({
+            "last_date": team_games.groupby("TEAM_ABBREVIATION")["GAME_DATE"].max(),
+            "OPP_DEF_RATING": 100 * totals["PTS_ALLOWED"] / totals["GAME_POSS"],
+            "OPP_PACE": 40 * totals["GAME_POSS"] / totals["GAME_MIN"],
+        })
+
+    def feature_rows(self, queries) -> pd.DataFrame:
+        """queries: iterable of (player name or id, opponent, date, home_away). Unknown players or
+        opponents raise KeyError, a home_away other than Home/Away raises ValueError."""
+        q = pd.DataFrame(list(queries), columns=["player", "OPP", "date", "HOME_AWAY"])
+        ids = q["player"].map(lambda p: int(p) if str(p).isdigit() else self.name_to_id.get(p))
+        missing = q.loc[~ids.isin(self.players.index), "player"].tolist()
+        if missing:
+            raise KeyError(f"unknown player(s): {missing}")
+        unknown = sorted(set(q["OPP"]) - set(self.teams.index), key=str)
+        if unknown:
+            raise KeyError(f"unknown team(s): {unknown}")
+        home_away = q["HOME_AWAY"].fillna("Home")
+        bad = sorted(set(home_away) - {"Home", "Away"}, key=str)
+        if bad:
+            raise ValueError(f"home_away must be Home or Away, got {bad}")
+        return self._rows_for(ids.astype(int).to_numpy(), q["OPP"], q["date"], home_away)
+
+    def _rows_for(self, ids, opp, date, home_away) -> pd.DataFrame:
+        """Feature rows for aligned arrays of player ids, opponents, dates and Home/Away flags."""
+        opp = pd.Series(opp).reset_index(drop=True)
+        rows = self.players.loc[ids].reset_index()
+        date = pd.to_datetime(pd.Series(date)).to_numpy()
+        team_last = rows["TEAM_ABBREVIATION"].map(self.teams["last_date"]).to_numpy()
+        opp_last = opp.map(self.teams["last_date"]).to_numpy()
+        rows["team_rest_days"] = pd.Series(date - team_last).dt.days.fillna(DEFAULT_DAYS).astype(int)
+        opp_rest = pd.Series(date - opp_last).dt.days.fillna(DEFAULT_DAYS).astype(int)
+        rows["rest_diff"] = rows["team_rest_days"] - opp_rest
+        rows["OPP"] = opp.to_numpy()
+        rows["HOME_AWAY"] = pd.Series(home_away).to_numpy()
+        rows["OPP_DEF_RATING"] = opp.map(self.teams["OPP_DEF_RATING"]).to_numpy()
+        rows["OPP_PACE"] = opp.map(self.teams["OPP_PACE"]).to_numpy()
+        for name, means in self.by_opp.items():
+            keys = pd.MultiIndex.from_arrays([rows["PLAYER_ID"], rows["OPP"]])
+            rows[name] = means.reindex(keys).to_numpy()
+        return rows
+
+    def _score(self, rows: pd.DataFrame, explain: bool = False) -> pd.DataFrame:
+        X = rows[self.model.input_columns]  # features, plus the routing column of a segmented model
+        rows["PRED_PTS"] = self.model.predict(X)
+        if explain:
+            rows = rows.join(self.model.contributions(X).add_prefix("SHAP_"))
+        return rows
+
+    def predict(self, queries, explain: bool = False) -> pd.DataFrame:
+        """Feature rows plus PRED_PTS for every query, scored in one predict call."""
+        return self._score(self.feature_rows(queries), explain)
+
+    def slate(self, games, explain: bool = False) -> pd.DataFrame:
+        """games: iterable of (away, home, date). Every current-season roster player on both sides is
+        projected in one predict call; returns the rows ranked by PRED_PTS."""
+        g = pd.DataFrame(list(games), columns=["away", "home", "date"])
+        sides = pd.concat([
+            pd.DataFrame({"TEAM": g["home"], "OPP": g["away"], "date": g["date"], "HOME_AWAY": "Home"}),
+            pd.DataFrame({"TEAM": g["away"], "OPP": g["home"], "date": g["date"], "HOME_AWAY": "Away"}),
+        ], ignore_index=True)
+        unknown = sorted(set(sides["TEAM"]) - set(self.rosters["TEAM_ABBREVIATION"]))
+        if unknown:
+            raise KeyError(f"unknown team(s): {unknown}")
+        entries = sides.merge(self.rosters, left_on="TEAM", right_on="TEAM_ABBREVIATION")
+        rows = self._rows_for(entries["PLAYER_ID"].to_numpy(), entries["OPP"], entries["date"], entries["HOME_AWAY"])
+        rows = self._score(rows, explain)
+        return rows.sort_values("PRED_PTS", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def parse_games(games: str, date) -> list:
+    """"LVA@ATL,CHI@NYL" -> [(away, home, date), ...]."""
+    pairs = [g.strip().split("@") for g in games.split(",") if g.strip()]
+    if any(len(p) != 2 for p in pairs):
+        raise ValueError(f"games must look like AWAY@HOME[,AWAY@HOME...], got {games!r}")
+    return [(away, home, date) for away, home in pairs]
+
+
+SLATE_COLUMNS = ["PLAYER_NAME", "TEAM_ABBREVIATION", "OPP", "HOME_AWAY", "PRED_PTS"]
+
+
+def top_drivers(rows: pd.DataFrame, n: int = 3) -> pd.Series:
+    """The n largest |SHAP| features per explained row, e.g. "avg_prev_5 +2.1, OPP_PACE -0.4"."""
+    shap = rows.filter(like="SHAP_").drop(columns="SHAP_BIAS")
+    order = (-shap.abs().to_numpy()).argsort(axis=1)[:, :n]
+    names = shap.columns.str.removeprefix("SHAP_").to_numpy()
+    return pd.Series([", ".join(f"{names[j]} {v[j]:+.1f}" for j in idx) for idx, v in zip(order, shap.to_numpy())],
+                     index=rows.index)
+
+
+def make_handler(service: PredictionService):
+    class PredictHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body):
+            payload = json.dumps(body, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _answer(self, queries, slate: bool = False, explain: bool = False):
+            try:
+                start = time.perf_counter()
+                out = service.slate(queries, explain) if slate else service.predict(queries, explain)
+                cols = (SLATE_COLUMNS if slate else ["PLAYER_NAME", "OPP", "HOME_AWAY", "PRED_PTS"]) + service.features
+                cols += [c for c in out.columns if c.startswith("SHAP_")]
+                body = {"predictions": out[list(dict.fromkeys(cols))].to_dict("records"),
+                        "ms": round(1000 * (time.perf_counter() - start), 2)}
+                self._send(200, body)
+            except (KeyError, ValueError) as e:
+                self._send(400, {"error": e.args[0] if e.args else str(e)})
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            q = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+            explain = q.get("explain", "0") not in ("0", "", "false")
+            if parsed.path == "/slate":
+                try:
+                    games = parse_games(q.get("games", ""), q.get("date"))
+                except ValueError as e:
+                    return self._send(400, {"error": e.args[0]})
+                return self._answer(games, slate=True, explain=explain)
+            if parsed.path != "/predict":
+                return self._send(404, {"error": "not found"})
+            self._answer([(q.get("player"), q.get("opp"), q.get("date"), q.get("home_away"))], explain=explain)
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/predict":
+                return self._send(404, {"error": "not found"})
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or "[]")
+                queries = [(r.get("player"), r.get("opp"), r.get("date"), r.get("home_away")) for r in body]
+            except (ValueError, AttributeError, TypeError):
+                return self._send(400, {"error": "expected a JSON list of {player, opp, date, home_away} objects"})
+            self._answer(queries)
+
+        def log_message(self, *args):
+            pass
+
+    return PredictHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Project player points from the persisted model.")
+    parser.add_argument("player", nargs="?")
+    parser.add_argument("opp", nargs="?")
+    parser.add_argument("date", nargs="?", help="game date (default --date)")
+    parser.add_argument("--date", dest="game_date", default=pd.Timestamp.today().strftime("%Y-%m-%d"),
+                        help="game date for --slate, or for a player query without a positional date (default today)")
+    parser.add_argument("--home-away", default="Home", choices=["Home", "Away"])
+    parser.add_argument("--slate", help="score every rostered player in these games, e.g. LVA@ATL,CHI@NYL")
+    parser.add_argument("--slate-file", help="CSV with away,home,date columns (one row per game)")
+    parser.add_argument("--top", type=int, default=25, help="rows of the ranked slate table to print")
+    parser.add_argument("--explain", action="store_true", help="add TreeSHAP contributions and top drivers")
+    parser.add_argument("--serve", action="store_true", help="run the local HTTP server")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default=MODEL_NAME, help="registry name")
+    parser.add_argument("--version", default="latest")
+    args = parser.parse_args()
+
+    if args.serve:  # long-running: no run report
+        service = PredictionService(args.model, version=args.version)
+        print(f"Loaded {args.model}/{os.path.basename(service.model.path)} and {len(service.players)} players")
+        print(f"Serving on http://127.0.0.1:{args.port}/predict (Ctrl+C to stop)")
+        ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(service)).serve_forever()
+    elif (args.slate or args.slate_file) and args.player:
+        parser.error("--slate/--slate-file take no player, opponent or date positionals; give the date with --date")
+    elif not (args.slate or args.slate_file or (args.player and args.opp)):
+        parser.error("give a player and opponent, --slate/--slate-file, or --serve")
+    date = args.date or args.game_date
+
+    with run_report("predict"):
+        start = time.perf_counter()
+        with stage("load_service") as s:
+            service = PredictionService(args.model, version=args.version)
+            s.rows = len(service.players)
+        print(f"Loaded {args.model}/{os.path.basename(service.model.path)} and {len(service.players)} players in {time.perf_counter() - start:.2f}s")
+        if args.slate or args.slate_file:
+            if args.slate_file:
+                games = pd.read_csv(args.slate_file)[["away", "home", "date"]].itertuples(index=False)
+            else:
+                games = parse_games(args.slate, date)
+            start = time.perf_counter()
+            with stage("slate") as s:
+                out = service.slate(games, args.explain)
+                s.rows = len(out)
+            elapsed = 1000 * (time.perf_counter() - start)
+            if args.explain:
+                out["drivers"] = top_drivers(out)
+            print(out[SLATE_COLUMNS + (["drivers"] if args.explain else [])].head(args.top).round(2).to_string())
+            print(f"{len(out)} players projected in {elapsed:.1f} ms")
+        else:
+            start = time.perf_counter()
+            with stage("predict", rows=1):
+                out = service.predict([(args.player, args.opp, date, args.home_away)], args.explain)
+            row = out.iloc[0]
+            print(f"{row['PLAYER_NAME']} vs {row['OPP']} ({row['HOME_AWAY']}, {date}): "
+                  f"{row['PRED_PTS']:.2f} PTS  [{1000 * (time.perf_counter() - start):.1f} ms]")
+            if args.explain:
+                print(f"  drivers: {top_drivers(out).iloc[0]} (baseline {row['SHAP_BIAS']:.2f})")
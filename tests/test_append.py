@@ -0,0 +1,43 @@
+import pandas as pd
+import pyarrow.dataset as ds
+import pytest
+from game_log_dataset import PARTITIONING, load_game_logs, to_table
+from mock_stats_server import LOG_HEADERS, build_league
+from pre_processing import INPUT_COLUMNS, build_features, save_outputs, load_state, update_features, verify_append
+from feature_store import load_features
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    """One synthetic season written as the crawler's partitioned dataset."""
+    _, rows = build_league(("2024",))
+    logs = pd.DataFrame(rows, columns=LOG_HEADERS).assign(GAME_DATE=lambda d: pd.to_datetime(d["GAME_DATE"]))
+    base = str(tmp_path_factory.mktemp("logs"))
+    ds.write_dataset(to_table(logs), base, format="parquet", partitioning=PARTITIONING)
+    return base
+
+
+def test_append_matches_full_rebuild(dataset):
+    verify_append(load_game_logs(dataset, columns=INPUT_COLUMNS), nights=5)  # asserts
+
+
+def test_append_reloads_last_date(dataset, tmp_path):
+    """The nightly load includes the state's last date: its processed rows are skipped, a late one raises."""
+    logs = load_game_logs(dataset, columns=INPUT_COLUMNS)
+    dates = sorted(logs["GAME_DATE"].unique())
+    through, late_row = dates[-2], logs.index[logs["GAME_DATE"] == dates[-2]][0]
+    store, state_dir = str(tmp_path / "features.arrow"), str(tmp_path / "state")
+
+    save_outputs(*build_features(logs[logs["GAME_DATE"] <= through].drop(late_row)), store, state_dir)
+    state, pending = load_state(state_dir)
+    new_logs = load_game_logs(dataset, columns=INPUT_COLUMNS, since=state["through"])
+    assert new_logs["GAME_DATE"].min() == through
+    with pytest.raises(ValueError, match="late box scores"):
+        update_features(load_features(store), pending, state, new_logs)
+
+    save_outputs(*build_features(logs[logs["GAME_DATE"] <= through]), store, state_dir)
+    state, pending = load_state(state_dir)
+    features, _, _ = update_features(load_features(store), pending, state, new_logs)
+    full, _, _ = build_features(logs)
+    assert len(features) == len(full)
+    assert not features.duplicated(["PLAYER_ID", "GAME_DATE"]).any()
@@ -0,0 +1,82 @@
+"""FetchEngine against mock_stats_server.py on an ephemeral port."""
+import time
+import pytest
+from fetch_engine import FetchEngine, TokenBucket
+from instrumentation import HttpStats
+import mock_stats_server
+
+PATH = "/stats/commonallplayers"
+
+
+@pytest.fixture
+def server():
+    servers = []
+
+    def start(**kwargs):
+        srv = mock_stats_server.serve(port=0, seasons=("2024",), retry_after=0, **kwargs)
+        servers.append(srv)
+        return f"http://127.0.0.1:{srv.server_address[1]}"
+
+    yield start
+    for srv in servers:
+        srv.shutdown()
+        srv.server_close()
+
+
+def engine(**kwargs) -> FetchEngine:
+    kwargs = {"rate": 1000.0, "burst": 1000, "backoff_base": 0.001, "http_stats": HttpStats(), **kwargs}
+    return FetchEngine({}, **kwargs)
+
+
+def test_retries_until_success_and_counts_match(server):
+    url = server(fail_rate=0.3, seed=1)
+    eng = engine(max_workers=4, max_retries=20)
+    results = list(eng.map(lambda _: eng.get(url + PATH, label="roster"), range(40)))
+
+    assert all(err is None and resp.status_code == 200 for _, resp, err in results)
+    injected = sum(mock_stats_server.StatsHandler.failures.values())
+    assert injected > 0
+    assert eng.requests == mock_stats_server.StatsHandler.request_count == 40 + injected
+    assert eng.retries == injected
+    stats = eng.http.summary()["roster"]
+    assert stats["calls"] == 40 and stats["attempts"] == 40 + injected
+    assert stats["statuses"] == {"200": 40, **{str(k): v for k, v in mock_stats_server.StatsHandler.failures.items()}}
+    assert sum(int(k) * v for k, v in stats["retries_per_call"].items()) == injected
+
+
+def test_gives_up_after_max_retries_and_429_slows_the_bucket(server):
+    url = server(fail_rate=1.0, seed=3)
+    eng = engine(max_workers=1, max_retries=3)
+    resp = eng.get(url + PATH)
+
+    assert mock_stats_server.StatsHandler.failures == {503: 3, 429: 1}  # seed 3: 503, 503, 429, 503
+    assert resp.status_code == 503  # the last failure is returned for the caller's raise_for_status()
+    assert eng.requests == mock_stats_server.StatsHandler.request_count == 4
+    assert eng.retries == 3
+    assert eng.bucket.rate == eng.bucket.max_rate / 2  # halved by the 429, never restored by a success
+
+
+def test_token_bucket_caps_the_request_rate(server):
+    url = server()
+    eng = engine(max_workers=4, rate=20.0, burst=1)
+    start = time.perf_counter()
+    list(eng.map(lambda _: eng.get(url + PATH), range(21)))
+    assert time.perf_counter() - start >= 0.9  # 20 tokens after the first at 20/s
+
+
+def test_bucket_recovers_after_slow_down():
+    bucket = TokenBucket(rate=50.0, capacity=1)
+    bucket.slow_down()
+    assert bucket.rate == 25.0
+    for _ in range(10):
+        bucket.speed_up()
+    assert bucket.rate == 50.0
+
+
+def test_connections_are_reused(server):
+    url = server()
+    eng = engine(max_workers=2)
+    list(eng.map(lambda _: eng.get(url + PATH), range(30)))
+    assert mock_stats_server.StatsHandler.request_count == 30
+    assert len(mock_stats_server.StatsHandler.connections) <= 2  # one keep-alive connection per worker
+    eng.close()
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from rolling_features import add_rolling_features
+
+SPECS = [
+    ("avg_prev_3",     ("PLAYER_ID",),        "PTS", 3),
+    ("avg_prev_opp_2", ("PLAYER_ID", "OPP"),  "PTS", 2),
+    ("ewm_prev_5",     ("PLAYER_ID",),        "PTS", 5, "ewm"),
+]
+
+
+def frame(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    pts = rng.integers(0, 30, n).astype(float)
+    pts[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({"PLAYER_ID": np.sort(rng.integers(0, 8, n)),
+                         "OPP": rng.choice(["ATL", "CHI", None], n), "PTS": pts})
+
+
+def test_matches_groupby_transform():
+    df = frame(400)
+    add_rolling_features(df, SPECS)
+    for name, keys, col, window, *kind in SPECS:
+        g = df.groupby(list(keys))[col]
+        if kind:
+            expected = g.transform(lambda x: x.shift(1).ewm(span=window).mean())
+        else:
+            expected = g.transform(lambda x: x.shift(1).rolling(window, min_periods=1).mean())
+        np.testing.assert_allclose(df[name], expected, rtol=1e-12, err_msg=name)  # null OPP keys stay NaN
+
+
+@pytest.mark.parametrize("n", [0, 1])
+def test_tiny_frames(n):
+    df = add_rolling_features(frame(n), SPECS)
+    assert len(df) == n and all(df[s[0]].isna().all() for s in SPECS)